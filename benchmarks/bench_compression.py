@@ -0,0 +1,165 @@
+"""
+Bytes on the wire, disk footprint and decode overhead of compression.
+
+Uses the fixture payloads of the fake Bakalari API (marks, messages,
+timetable, homeworks, events) and measures:
+
+- every available codec (gzip, zlib, br, zstd) on each payload: compressed
+  size, compression throughput and decode time,
+- bytes on the wire for a Client sweep over the endpoints per negotiated
+  Accept-Encoding, counted by the fake API,
+- disk footprint and load time of SnapshotStore files and SQLiteCache
+  values, compressed (zstd or zlib) vs the plain JSON stored before.
+
+Usage:
+    pip install zstandard brotli
+    python benchmarks/bench_compression.py [--rounds 50] [--latency 0]
+"""
+
+import argparse
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import cache  # noqa: E402
+from benchmarks import fake_bakalari as fake  # noqa: E402
+from benchmarks.bench_http2 import free_port, wait_for  # noqa: E402
+from client import Client, supported_encodings  # noqa: E402
+from snapshots import SnapshotStore  # noqa: E402
+
+CODECS = {
+    "gzip-6": (lambda data: gzip.compress(data, 6), gzip.decompress),
+    "zlib-6": (lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+try:
+    import brotli
+
+    CODECS["br-5"] = (lambda data: brotli.compress(data, quality=5), brotli.decompress)
+except ImportError:
+    pass
+if cache.ZSTD_AVAILABLE:
+    import zstandard
+
+    CODECS["zstd-3"] = (lambda data: zstandard.compress(data, 3), zstandard.decompress)
+
+
+def payloads() -> dict[str, bytes]:
+    return {
+        "marks": cache.encode(fake.marks()),
+        "messages": cache.encode({"Messages": [fake.message(index) for index in range(60)]}),
+        "timetable": cache.encode(fake.timetable(fake.monday(date.today()), permanent=False)),
+        "homeworks": cache.encode(fake.homeworks()),
+        "events": cache.encode(fake.events()),
+    }
+
+
+def timed(function, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) / rounds
+
+
+def bench_codecs(data: dict[str, bytes], rounds: int) -> None:
+    print(f"{'payload':10} {'codec':7} {'bytes':>8} {'ratio':>6} {'comp MB/s':>10} {'decode us':>10}")
+    for name, raw in data.items():
+        print(f"{name:10} {'none':7} {len(raw):8}")
+        for codec, (compress, decompress) in CODECS.items():
+            packed = compress(raw)
+            comp = timed(lambda: compress(raw), rounds)
+            dec = timed(lambda: decompress(packed), rounds)
+            print(
+                f"{'':10} {codec:7} {len(packed):8} {len(raw) / len(packed):6.1f} "
+                f"{len(raw) / comp / 1e6:10.1f} {dec * 1e6:10.1f}"
+            )
+
+
+def sweep(client: Client) -> None:
+    client.get_marks()
+    client.get_komens_messages_noticeboard()
+    client.get_actual_timetable()
+    client.get_homeworks()
+    client.get_events()
+
+
+def bench_wire(latency: float, rounds: int) -> None:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_bakalari:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=dict(os.environ, FAKE_BK_LATENCY=str(latency)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(base_url + "/_stats")
+        print(f"\n{'Accept-Encoding':28} {'wire bytes':>10} {'raw bytes':>10} {'ratio':>6} {'sweep ms':>9}")
+        encodings = ["identity", "gzip, deflate"]
+        encodings += [encoding for encoding in ("br", "zstd") if encoding in supported_encodings()]
+        encodings.append(supported_encodings())
+        for accept in encodings:
+            client = Client("pwd", "user", base_url, accept_encoding=accept)
+            sweep(client)  # log in and open the connection
+            httpx.post(base_url + "/_reset")
+            elapsed = timed(lambda: sweep(client), rounds)
+            client.close()
+            sent = httpx.get(base_url + "/_stats").json()["bytes"]
+            print(
+                f"{accept:28} {sent['sent'] // rounds:10} {sent['raw'] // rounds:10} "
+                f"{sent['raw'] / sent['sent']:6.1f} {elapsed * 1000:9.2f}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_disk(data: dict[str, bytes], rounds: int) -> None:
+    values = {name: cache.decode(raw) for name, raw in data.items()}
+    raw_total = sum(len(raw) for raw in data.values())
+    codec = "zstd" if cache.ZSTD_AVAILABLE else "zlib"
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(os.path.join(directory, "snapshots"))
+        for name, value in values.items():
+            store.save(name, value)
+        files = [entry.path for entry in os.scandir(store.directory)]
+        disk = sum(os.path.getsize(path) for path in files)
+        load = timed(lambda: [store.load(name) for name in values], rounds)
+        plain = timed(lambda: [cache.json.loads(raw) for raw in data.values()], rounds)
+        print(f"\nsnapshots    plain JSON {raw_total} B, {codec} {disk} B ({raw_total / disk:.1f}x)")
+        print(f"             load all {load * 1000:.2f} ms, of which JSON parsing {plain * 1000:.2f} ms")
+
+        sqlite = cache.SQLiteCache(os.path.join(directory, "cache.sqlite"))
+        for name, value in values.items():
+            sqlite.set(name, value, 3600)
+        stored = sqlite.size_bytes
+        get = timed(lambda: [sqlite.get(name) for name in values], rounds)
+        sqlite.close()
+        print(f"sqlite cache plain JSON {raw_total} B, {codec} {stored} B ({raw_total / stored:.1f}x), get all {get * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency in seconds")
+    args = parser.parse_args()
+
+    data = payloads()
+    bench_codecs(data, args.rounds)
+    bench_wire(args.latency, max(args.rounds // 5, 1))
+    bench_disk(data, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
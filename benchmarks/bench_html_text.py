@@ -0,0 +1,72 @@
+"""
+Throughput of the HTML-to-text converter on large noticeboard dumps.
+
+Builds a synthetic noticeboard (or loads a real dump saved from
+Client.get_komens_messages_noticeboard) and measures cold conversion,
+memoized conversion through MessageTextCache and the size reduction.
+
+Usage:
+    python benchmarks/bench_html_text.py [--messages 2000] [--dump noticeboard.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from html_text import MessageTextCache, html_to_text  # noqa: E402
+
+BODY = (
+    "<p>Vážení rodiče, milí žáci,</p>"
+    "<p>dne <b>{index}. 6.</b> proběhne <i>sportovní den</i>. Program:</p>"
+    "<ol><li>8:00 sraz před školou</li><li>8:30 přesun na stadion"
+    "<ul><li>s sebou sportovní oblečení</li><li>pití &amp; svačinu</li></ul></li>"
+    "<li>12:00 návrat</li></ol>"
+    "<table><tr><th>Třída</th><th>Dozor</th></tr><tr><td>4.A</td><td>Mgr. Novák</td></tr></table>"
+    '<p>Podrobnosti na <a href="https://example.org/sportovni-den/{index}">webu školy</a>.'
+    "<br>S pozdravem<br>vedení školy</p>"
+)
+
+
+def noticeboard(count: int) -> list[dict]:
+    return [{"Id": f"N{index}", "Text": BODY.format(index=index) * 4} for index in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--dump", type=Path, help="JSON dump of a noticeboard response")
+    args = parser.parse_args()
+
+    if args.dump:
+        messages = json.loads(args.dump.read_text(encoding="utf-8"))["Messages"]
+    else:
+        messages = noticeboard(args.messages)
+    html_bytes = sum(len(m["Text"].encode("utf-8")) for m in messages)
+
+    start = time.perf_counter()
+    texts = [html_to_text(m["Text"]) for m in messages]
+    cold = time.perf_counter() - start
+    text_bytes = sum(len(t.encode("utf-8")) for t in texts)
+
+    cache = MessageTextCache(max_entries=len(messages))
+    for m in messages:
+        cache.convert(m)
+    start = time.perf_counter()
+    for m in messages:
+        cache.convert(m)
+    warm = time.perf_counter() - start
+
+    print(f"messages        {len(messages)}")
+    print(f"html            {html_bytes / 1e6:.2f} MB")
+    print(f"text            {text_bytes / 1e6:.2f} MB ({text_bytes / html_bytes:.0%} of html)")
+    print(f"cold convert    {cold * 1000:.1f} ms  {html_bytes / 1e6 / cold:.1f} MB/s")
+    print(f"memoized        {warm * 1000:.1f} ms  {warm / len(messages) * 1e6:.1f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares HTTP/1.1 and HTTP/2 for concurrent fan-out to one school host.
+
+Starts the fake Bakalari API (benchmarks/fake_bakalari.py) under hypercorn,
+which speaks h2 over cleartext, and runs the same concurrent workload
+(multi-week timetables + message details) through Client with both
+transports. The HTTP/2 client uses prior knowledge because there is no TLS
+(and so no ALPN) on the local stand-in.
+
+Usage:
+    pip install hypercorn h2
+    python benchmarks/bench_http2.py [--requests 64] [--rounds 5] [--latency 0.05]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from client import Client  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def workload(client: Client, count: int) -> None:
+    today = date.today()
+    calls = []
+    for index in range(count):
+        if index % 2:
+            calls.append(lambda i=index: client.get_komens_messages_received_id(f"MSG{i}"))
+        else:
+            day = (today + timedelta(weeks=index // 2)).isoformat()
+            calls.append(lambda d=day: client.get_actual_timetable(d))
+    client.gather(calls, max_workers=count)
+
+
+def run(base_url: str, http2: bool, count: int, rounds: int) -> dict:
+    client = Client("pwd", "user", base_url, http2=http2, max_connections=count)
+    if http2:
+        # no TLS on the stand-in, so h2 has to be spoken with prior knowledge
+        client.http.close()
+        client.http = httpx.Client(http1=False, http2=True, limits=httpx.Limits(max_connections=count))
+    httpx.post(base_url + "/_reset")
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        workload(client, count)
+        timings.append(time.perf_counter() - start)
+    client.close()
+    server_stats = httpx.get(base_url + "/_stats").json()
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "connections": server_stats["connections"],
+        "http_versions": server_stats["http_versions"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64, help="concurrent requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency in seconds")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, FAKE_BK_LATENCY=str(args.latency))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "hypercorn", "benchmarks.fake_bakalari:app", "--bind", f"127.0.0.1:{port}"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(base_url + "/_stats")
+        for label, http2 in (("HTTP/1.1", False), ("HTTP/2", True)):
+            result = run(base_url, http2, args.requests, args.rounds)
+            print(
+                f"{label:9} median {result['median_s'] * 1000:8.1f} ms  "
+                f"min {result['min_s'] * 1000:8.1f} ms  "
+                f"connections {result['connections']:3}  versions {result['http_versions']}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Local stand-in for the Bakalari API used by the benchmarks.
+
+Serves deterministic fixture payloads with a configurable latency, so the
+benchmarks measure the client/server side and not a real school server.
+Run it with any ASGI server, e.g.:
+
+    hypercorn benchmarks.fake_bakalari:app --bind 127.0.0.1:8765
+    uvicorn benchmarks.fake_bakalari:app --port 8765
+
+Environment:
+    FAKE_BK_LATENCY   seconds added to every API response (default 0.05)
+    FAKE_BK_COMPRESS  compress API responses as the client accepts, zstd, br
+                      or gzip (default 1, zstd and br when their packages are installed)
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+LATENCY = float(os.getenv("FAKE_BK_LATENCY", "0.05"))
+COMPRESS = os.getenv("FAKE_BK_COMPRESS", "1") == "1"
+
+ENCODERS = {"gzip": lambda data: gzip.compress(data, 6)}
+try:
+    import brotli
+
+    ENCODERS["br"] = lambda data: brotli.compress(data, quality=5)
+except ImportError:
+    pass
+try:
+    import zstandard
+
+    ENCODERS["zstd"] = lambda data: zstandard.compress(data, 3)
+except ImportError:
+    pass
+
+stats: dict = {"requests": Counter(), "connections": set(), "http_versions": Counter(), "bytes": Counter()}
+
+SUBJECTS = [
+    ("S1", "M", "Matematika"),
+    ("S2", "Čj", "Český jazyk"),
+    ("S3", "Aj", "Anglický jazyk"),
+    ("S4", "F", "Fyzika"),
+    ("S5", "Ch", "Chemie"),
+    ("S6", "D", "Dějepis"),
+    ("S7", "Inf", "Informatika"),
+    ("S8", "Tv", "Tělesná výchova"),
+]
+TEACHERS = [(f"T{i}", f"Učitel {i}") for i in range(1, 9)]
+ROOMS = [(f"R{i}", f"{100 + i}") for i in range(1, 9)]
+HOURS = [
+    (2 + i, str(i), f"{(425 + i * 55) // 60}:{(425 + i * 55) % 60:02d}", f"{(470 + i * 55) // 60}:{(470 + i * 55) % 60:02d}")
+    for i in range(1, 9)
+]
+
+
+def monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def timetable(week_start: date | None, permanent: bool) -> dict:
+    rnd = random.Random(0 if week_start is None else week_start.toordinal())
+    days = []
+    for weekday in range(5):
+        atoms = []
+        for index, (hour_id, *_rest) in enumerate(HOURS[:6]):
+            subject = SUBJECTS[(weekday + index) % len(SUBJECTS)][0]
+            slot = (weekday + index) % len(TEACHERS)
+            atom = {
+                "HourId": hour_id,
+                "GroupIds": ["G1"],
+                "SubjectId": subject,
+                "TeacherId": TEACHERS[slot][0],
+                "RoomId": ROOMS[slot][0],
+                "CycleIds": [],
+                "Change": None,
+                "HomeworkIds": [],
+                "Theme": "" if permanent else f"Téma {weekday}-{index}",
+            }
+            if not permanent and rnd.random() < 0.1:
+                atom["RoomId"] = ROOMS[(slot + 1) % len(ROOMS)][0]
+                atom["Change"] = {
+                    "ChangeSubject": None,
+                    "Day": None,
+                    "Hours": None,
+                    "ChangeType": "RoomChanged",
+                    "Description": "Změna místnosti",
+                    "Time": None,
+                    "TypeAbbrev": None,
+                    "TypeName": None,
+                }
+            atoms.append(atom)
+        day_date = "" if week_start is None else (week_start + timedelta(days=weekday)).isoformat() + "T00:00:00+02:00"
+        days.append({"Atoms": atoms, "DayOfWeek": weekday + 1, "Date": day_date, "DayDescription": "", "DayType": "WorkDay"})
+    return {
+        "Hours": [{"Id": h, "Caption": c, "BeginTime": b, "EndTime": e} for h, c, b, e in HOURS],
+        "Days": days,
+        "Classes": [{"Id": "C1", "Abbrev": "4.A", "Name": "4.A"}],
+        "Groups": [{"Id": "G1", "Abbrev": "cel", "Name": "celá třída", "ClassId": "C1"}],
+        "Subjects": [{"Id": i, "Abbrev": a, "Name": n} for i, a, n in SUBJECTS],
+        "Teachers": [{"Id": i, "Abbrev": n[-2:], "Name": n} for i, n in TEACHERS],
+        "Rooms": [{"Id": i, "Abbrev": a, "Name": a} for i, a in ROOMS],
+        "Cycles": [],
+    }
+
+
+def marks() -> dict:
+    rnd = random.Random(1)
+    start = date.today() - timedelta(days=300)
+    subjects = []
+    for subject_id, abbrev, name in SUBJECTS:
+        items = []
+        for index in range(25):
+            mark_date = start + timedelta(days=index * 12 + rnd.randint(0, 5))
+            value = rnd.randint(1, 5)
+            items.append(
+                {
+                    "MarkDate": mark_date.isoformat() + "T00:00:00+01:00",
+                    "EditDate": mark_date.isoformat() + "T00:00:00+01:00",
+                    "Caption": f"Písemka {index}",
+                    "Theme": f"Kapitola {index}",
+                    "MarkText": str(value),
+                    "IsInvalidDate": False,
+                    "TypeNote": "",
+                    "Weight": rnd.choice([1, 2, 3, 5]),
+                    "SubjectId": subject_id,
+                    "IsNew": False,
+                    "IsPoints": False,
+                    "CalculatedMarkText": "",
+                    "ClassRankText": None,
+                    "Id": f"{subject_id}-M{index}",
+                    "PointsText": "",
+                    "MaxPoints": 0,
+                }
+            )
+        subjects.append(
+            {
+                "Marks": items,
+                "Subject": {"Id": subject_id, "Abbrev": abbrev, "Name": name},
+                "AverageText": "2,50",
+                "TemporaryMark": "",
+                "SubjectNote": "",
+                "TemporaryMarkNote": "",
+                "PointsOnly": False,
+                "MarkPredictionEnabled": True,
+            }
+        )
+    return {"Subjects": subjects}
+
+
+def message(index: int) -> dict:
+    return {
+        "$type": "GeneralMessage",
+        "Id": f"MSG{index}",
+        "Title": f"Zpráva {index}",
+        "Text": (
+            f"<p>Dobrý den,</p><p>informace k akci <b>{index}</b>:</p>"
+            "<ul><li>sraz v 8:00</li><li>s sebou svačinu</li></ul>"
+            '<p>Více na <a href="https://example.org/akce">webu školy</a>.</p>'
+        )
+        * 3,
+        "SentDate": (date.today() - timedelta(days=index)).isoformat() + "T08:00:00+02:00",
+        "Sender": {"Id": "T1", "Type": "teacher", "Name": "Učitel 1"},
+        "Attachments": [],
+        "Read": index % 3 != 0,
+        "LifeTime": "ToRead",
+        "DateFrom": None,
+        "DateTo": None,
+        "Confirmed": False,
+        "CanConfirm": False,
+        "Type": "OBECNA",
+        "CanAnswer": True,
+        "Hidden": False,
+        "CanHide": True,
+        "RelevantName": "Učitel 1",
+        "RelevantPersonType": "teacher",
+    }
+
+
+def homeworks() -> dict:
+    today = date.today()
+    items = []
+    for index in range(40):
+        subject_id, abbrev, name = SUBJECTS[index % len(SUBJECTS)]
+        start = today - timedelta(days=30 - index)
+        items.append(
+            {
+                "ID": f"HW{index}",
+                "DateAward": start.isoformat() + "T00:00:00+02:00",
+                "DateControl": None,
+                "DateDone": None,
+                "DateStart": start.isoformat() + "T00:00:00+02:00",
+                "DateEnd": (start + timedelta(days=7)).isoformat() + "T00:00:00+02:00",
+                "Content": f"Úkol {index}: cvičení {index} až {index + 5}",
+                "Notice": "",
+                "Done": index < 15,
+                "Closed": index < 10,
+                "Electronic": False,
+                "Hour": 2,
+                "Class": {"Id": "C1", "Abbrev": "4.A", "Name": "4.A"},
+                "Group": {"Id": "G1", "Abbrev": "cel", "Name": "celá třída"},
+                "Subject": {"Id": subject_id, "Abbrev": abbrev, "Name": name},
+                "Teacher": {"Id": "T1", "Abbrev": "U1", "Name": "Učitel 1"},
+                "Attachments": [],
+            }
+        )
+    return {"Homeworks": items}
+
+
+def events() -> dict:
+    today = date.today()
+    items = []
+    for index in range(30):
+        day = today + timedelta(days=index - 10)
+        items.append(
+            {
+                "Id": f"EV{index}",
+                "Title": f"Akce {index}",
+                "Description": "",
+                "EventType": {"Id": "1", "Abbrev": "A", "Name": "Akce"},
+                "EventTimes": [
+                    {
+                        "WholeDay": index % 4 == 0,
+                        "StartTime": day.isoformat() + "T09:00:00+02:00",
+                        "EndTime": day.isoformat() + "T11:00:00+02:00",
+                    }
+                ],
+                "Classes": [{"Id": "C1", "Abbrev": "4.A", "Name": "4.A"}],
+                "ClassSets": [],
+                "Teachers": [],
+                "TeacherSets": [],
+                "Rooms": [],
+                "RoomSets": [],
+                "Students": [],
+                "Note": None,
+                "DateChanged": today.isoformat() + "T00:00:00+02:00",
+            }
+        )
+    return {"Events": items}
+
+
+def themes(subject_id: str) -> dict:
+    start = date.today() - timedelta(days=60)
+    return {
+        "Themes": [
+            {
+                "Date": (start + timedelta(days=index * 3)).isoformat() + "T00:00:00+02:00",
+                "Theme": f"{subject_id} téma {index}",
+                "Note": "",
+                "HourCaption": str(index % 6 + 1),
+                "LessonLabel": str(index + 1),
+            }
+            for index in range(20)
+        ]
+    }
+
+
+async def login(request: Request) -> Response:
+    return JSONResponse({"access_token": "fake-access", "refresh_token": "fake-refresh", "token_type": "Bearer"})
+
+
+def encoded(request: Request, body) -> Response:
+    """JSON response compressed with the best coding the client accepts, like IIS does."""
+    data = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    stats["bytes"]["raw"] += len(data)
+    accepted = {token.split(";")[0].strip() for token in request.headers.get("accept-encoding", "").split(",")}
+    encoding = next((name for name in ("zstd", "br", "gzip") if COMPRESS and name in accepted and name in ENCODERS), None)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        data = ENCODERS[encoding](data)
+        headers["Content-Encoding"] = encoding
+    stats["bytes"]["sent"] += len(data)
+    stats["bytes"][encoding or "identity"] += len(data)
+    return Response(data, media_type="application/json", headers=headers)
+
+
+async def api(request: Request) -> Response:
+    stats["requests"][request.url.path] += 1
+    stats["connections"].add(tuple(request.scope.get("client") or ()))
+    stats["http_versions"][request.scope.get("http_version", "1.1")] += 1
+    await asyncio.sleep(LATENCY)
+
+    path = request.path_params["path"]
+    if path == "timetable/permanent":
+        body = timetable(None, permanent=True)
+    elif path == "timetable/actual":
+        requested = request.query_params.get("date")
+        body = timetable(monday(date.fromisoformat(requested) if requested else date.today()), permanent=False)
+    elif path == "marks":
+        body = marks()
+    elif path in ("marks/count-new", "homeworks/count-actual", "komens/messages/received/unread", "komens/messages/noticeboard/unread"):
+        body = 3
+    elif path == "homeworks":
+        body = homeworks()
+    elif path.startswith("events"):
+        body = events()
+    elif path in ("komens/messages/received", "komens/messages/sent", "komens/messages/noticeboard"):
+        body = {"Messages": [message(index) for index in range(60)]}
+    elif path.startswith("komens/message/") and path.endswith("/mark-as-read"):
+        return Response(status_code=204)
+    elif path.startswith(("komens/messages/received/", "komens/messages/sent/", "komens/message/")):
+        body = {"Message": message(int(path.rsplit("MSG", 1)[-1] or 0))}
+    elif path == "subjects":
+        body = {
+            "Subjects": [
+                {"SubjectID": i, "SubjectAbbrev": a, "SubjectName": n, "TeacherID": "T1", "TeacherName": "Učitel 1"}
+                for i, a, n in SUBJECTS
+            ]
+        }
+    elif path.startswith("subjects/themes/"):
+        body = themes(path.rsplit("/", 1)[-1])
+    elif path == "substitutions":
+        body = {"From": date.today().isoformat(), "To": date.today().isoformat(), "Changes": []}
+    elif path == "user":
+        body = {"UserUID": "U1", "FullName": "Student Testovací", "Class": {"Id": "C1", "Abbrev": "4.A"}, "UserType": "student"}
+    elif path == "absence/student":
+        body = {"PercentageThreshold": 0.25, "Absences": [], "AbsencesPerSubject": []}
+    else:
+        body = {}
+    return encoded(request, body)
+
+
+async def stats_endpoint(request: Request) -> Response:
+    return JSONResponse(
+        {
+            "requests": dict(stats["requests"]),
+            "total": sum(stats["requests"].values()),
+            "connections": len(stats["connections"]),
+            "http_versions": dict(stats["http_versions"]),
+            "bytes": dict(stats["bytes"]),
+        }
+    )
+
+
+async def reset_endpoint(request: Request) -> Response:
+    stats["requests"].clear()
+    stats["connections"].clear()
+    stats["http_versions"].clear()
+    stats["bytes"].clear()
+    return Response(status_code=204)
+
+
+app = Starlette(
+    routes=[
+        Route("/api/login", login, methods=["POST"]),
+        Route("/api/3/{path:path}", api, methods=["GET", "POST"]),
+        Route("/_stats", stats_endpoint),
+        Route("/_reset", reset_endpoint, methods=["POST"]),
+    ]
+)
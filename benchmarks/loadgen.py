@@ -0,0 +1,307 @@
+"""
+Load generator driving many concurrent MCP sessions against server.py.
+
+Starts the fake Bakalari API (benchmarks/fake_bakalari.py) and the MCP
+server, then runs N simulated clients which each open an MCP session and
+call tools from a weighted, realistic mix (timetable, marks, messages,
+homeworks, events) for the given duration. Reports:
+
+- per-tool and overall p50/p95/p99 latency and error counts,
+- throughput (tool calls per second),
+- upstream amplification: requests to the school API per tool call,
+- RSS of the server process(es) over time, sampled from /proc.
+
+With --transport stdio every session spawns its own server process, as an
+MCP host would. With --transport http one server (BK_WORKERS=--workers)
+serves all sessions over streamable HTTP.
+
+Usage:
+    python benchmarks/loadgen.py [--sessions 20] [--duration 30] [--transport http]
+        [--workers 1] [--think 0.1] [--latency 0.05] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_http2 import free_port, wait_for  # noqa: E402
+
+# (weight, tool, arguments factory)
+TOOL_MIX = [
+    (20, "get_actual_timetable", lambda rnd: {}),
+    (8, "get_current_lesson", lambda rnd: {}),
+    (6, "get_timetable_changes", lambda rnd: {}),
+    (14, "get_marks", lambda rnd: {}),
+    (5, "get_marks_count_new", lambda rnd: {}),
+    (10, "get_komens_messages_received", lambda rnd: {}),
+    (10, "get_komens_messages_received_id", lambda rnd: {"id": f"MSG{rnd.randrange(60)}"}),
+    (5, "get_komens_messages_received_unread", lambda rnd: {}),
+    (8, "get_homeworks_due_this_week", lambda rnd: {}),
+    (4, "get_homeworks_due_tomorrow", lambda rnd: {}),
+    (
+        5,
+        "get_events_between",
+        lambda rnd: {
+            "date_from": date.today().isoformat(),
+            "date_to": (date.today() + timedelta(days=rnd.randrange(1, 30))).isoformat(),
+        },
+    ),
+    (5, "get_subjects", lambda rnd: {}),
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    # nearest rank
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def descendants(pid: int) -> list[int]:
+    """The pid and all its descendant processes, read from /proc."""
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                # the command name may contain spaces, fields after it are fixed
+                ppid = int(file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        found.append(current)
+        stack.extend(children.get(current, []))
+    return found
+
+
+def rss_bytes(pids: list[int]) -> int:
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.rss: list[tuple[float, int]] = []
+        self.excluded: set[int] = set()  # processes not counted as the server
+
+
+async def session_loop(session: ClientSession, recorder: Recorder, deadline: float, think: float, seed: int) -> None:
+    rnd = random.Random(seed)
+    weights = [weight for weight, _, _ in TOOL_MIX]
+    await session.initialize()
+    await session.list_tools()
+    while time.monotonic() < deadline:
+        _, tool, arguments = rnd.choices(TOOL_MIX, weights)[0]
+        start = time.perf_counter()
+        try:
+            result = await session.call_tool(tool, arguments(rnd))
+            failed = result.isError
+        except Exception:
+            failed = True
+        recorder.latencies[tool].append(time.perf_counter() - start)
+        if failed:
+            recorder.errors[tool] += 1
+        if think:
+            await asyncio.sleep(rnd.expovariate(1 / think))
+
+
+async def stdio_session(env: dict, recorder: Recorder, deadline: float, think: float, seed: int) -> None:
+    params = StdioServerParameters(command=sys.executable, args=["server.py"], env=env, cwd=str(ROOT))
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session_loop(session, recorder, deadline, think, seed)
+
+
+async def http_session(url: str, recorder: Recorder, deadline: float, think: float, seed: int) -> None:
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session_loop(session, recorder, deadline, think, seed)
+
+
+async def sample_rss(root_pid: int, recorder: Recorder, started: float, interval: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        pids = [pid for pid in descendants(root_pid) if pid not in recorder.excluded]
+        recorder.rss.append((time.monotonic() - started, rss_bytes(pids)))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args: argparse.Namespace, api_url: str, fake_pid: int) -> tuple[Recorder, float]:
+    recorder = Recorder()
+    env = dict(
+        os.environ,
+        BK_API_BASE=api_url,
+        BK_USER="user",
+        BK_PWD="pwd",
+        BK_USAGE_PATH="",
+    )
+    env.setdefault("BK_SNAPSHOTS", "0")
+    env.setdefault("BK_WARMUP", "0")
+    server = None
+    if args.transport == "http":
+        port = free_port()
+        env.update(BK_TRANSPORT="streamable-http", BK_PORT=str(port), BK_WORKERS=str(args.workers))
+        server = subprocess.Popen(
+            [sys.executable, "server.py"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        wait_for(f"http://127.0.0.1:{port}/healthz")
+        root_pid = server.pid
+    else:
+        # stdio servers are children of the load generator, next to the fake API
+        root_pid = os.getpid()
+        recorder.excluded = {os.getpid(), fake_pid}
+
+    httpx.post(api_url + "/_reset")
+    started = time.monotonic()
+    deadline = started + args.duration
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(root_pid, recorder, started, args.sample_interval, stop))
+    try:
+        if args.transport == "http":
+            url = f"http://127.0.0.1:{port}/mcp"
+            sessions = [http_session(url, recorder, deadline, args.think, seed) for seed in range(args.sessions)]
+        else:
+            sessions = [stdio_session(env, recorder, deadline, args.think, seed) for seed in range(args.sessions)]
+        results = await asyncio.gather(*sessions, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                print(f"session failed: {result!r}", file=sys.stderr)
+        elapsed = time.monotonic() - started
+    finally:
+        stop.set()
+        await sampler
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return recorder, elapsed
+
+
+def report(recorder: Recorder, elapsed: float, upstream: dict, as_json: bool) -> None:
+    every = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    calls = len(every)
+    tools = {
+        tool: {
+            "calls": len(latencies),
+            "errors": recorder.errors.get(tool, 0),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+        for tool, latencies in sorted(recorder.latencies.items())
+    }
+    summary = {
+        "calls": calls,
+        "errors": sum(recorder.errors.values()),
+        "elapsed_s": elapsed,
+        "throughput_per_s": calls / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(every, 50) * 1000,
+        "p95_ms": percentile(every, 95) * 1000,
+        "p99_ms": percentile(every, 99) * 1000,
+        "upstream_requests": upstream["total"],
+        "amplification": upstream["total"] / calls if calls else 0.0,
+        "upstream_connections": upstream["connections"],
+        "rss_peak_mb": max((rss for _, rss in recorder.rss), default=0) / 2**20,
+        "rss_mb": [(round(t, 1), round(rss / 2**20, 1)) for t, rss in recorder.rss],
+        "tools": tools,
+        "upstream": upstream["requests"],
+    }
+    if as_json:
+        print(json.dumps(summary, indent=1))
+        return
+
+    print(f"{'tool':40} {'calls':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for tool, row in tools.items():
+        print(
+            f"{tool:40} {row['calls']:6} {row['errors']:4} "
+            f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f}"
+        )
+    print(
+        f"{'all':40} {calls:6} {summary['errors']:4} "
+        f"{summary['p50_ms']:8.1f} {summary['p95_ms']:8.1f} {summary['p99_ms']:8.1f}"
+    )
+    print(f"\nthroughput     {summary['throughput_per_s']:.1f} calls/s over {elapsed:.1f} s")
+    print(
+        f"upstream       {upstream['total']} requests, {summary['amplification']:.3f} per tool call, "
+        f"{upstream['connections']} connections"
+    )
+    if recorder.rss:
+        mean = statistics.mean(rss for _, rss in recorder.rss) / 2**20
+        print(f"server RSS     peak {summary['rss_peak_mb']:.1f} MB, mean {mean:.1f} MB")
+        step = max(1, len(recorder.rss) // 10)
+        print("               " + "  ".join(f"{t:.0f}s:{mb:.0f}MB" for t, mb in summary["rss_mb"][::step]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent MCP sessions")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--transport", choices=("stdio", "http"), default="http")
+    parser.add_argument("--workers", type=int, default=1, help="server workers for --transport http")
+    parser.add_argument("--think", type=float, default=0.1, help="mean pause between calls of a session, seconds")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency in seconds")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="RSS sampling interval, seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    # the client module configures INFO logging, one line per request is too much here
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    port = free_port()
+    api_url = f"http://127.0.0.1:{port}"
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_bakalari:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=dict(os.environ, FAKE_BK_LATENCY=str(args.latency)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(api_url + "/_stats")
+        recorder, elapsed = asyncio.run(run(args, api_url, fake.pid))
+        upstream = httpx.get(api_url + "/_stats").json()
+    finally:
+        fake.terminate()
+        fake.wait()
+    report(recorder, elapsed, upstream, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+from typing import Any, Callable
+from cache import encode
+from paging import Paginator
+
+# rough average for JSON with Czech text
+CHARS_PER_TOKEN = 4
+# list key of text kept as lines behind a continuation handle
+TEXT = "Text"
+
+
+def estimate_tokens(value: Any) -> int:
+    """
+    Estimates how many tokens a tool result takes in the model's context.
+    """
+    text = value if isinstance(value, str) else encode(value).decode("utf-8")
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _largest_list(value: Any) -> str | None:
+    if not isinstance(value, dict):
+        return None
+    lists = [(len(encode(v)), key) for key, v in value.items() if isinstance(v, list) and v]
+    return max(lists)[1] if lists else None
+
+
+def _largest_text(value: Any, path: tuple[str, ...] = ()) -> tuple[int, tuple[str, ...]] | None:
+    """
+    (length, key path) of the longest string in nested dicts, e.g. the text of a message.
+    """
+    found = None
+    for key, item in value.items():
+        if isinstance(item, str):
+            candidate = (len(item), (*path, key))
+        elif isinstance(item, dict):
+            candidate = _largest_text(item, (*path, key))
+        else:
+            continue
+        if candidate is not None and (found is None or candidate > found):
+            found = candidate
+    return found
+
+
+def _get(value: dict, path: tuple[str, ...]) -> str:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _replaced(value: dict, path: tuple[str, ...], text: str) -> dict:
+    """
+    Copy of nested dicts with the string at path replaced.
+    """
+    key, *rest = path
+    return {**value, key: _replaced(value[key], tuple(rest), text) if rest else text}
+
+
+class ResultBudget:
+    """
+    Keeps tool results within a token budget.
+
+    A result over budget is degraded step by step: first to a summary view
+    (when the tool has a summarizer), then to truncated detail. Either way
+    the full list is kept as a paging snapshot and a continuation handle is
+    returned, so the rest can be read with next_page. Results without a list
+    have their longest text cut instead, e.g. the text of a message, kept in
+    the snapshot as lines; plain text results and a first item larger than
+    the whole page are cut the same way.
+    """
+
+    def __init__(self, paginator: Paginator, max_tokens: int):
+        """
+        Args:
+            paginator (Paginator): Stores the snapshots behind continuation handles.
+            max_tokens (int): Budget per tool result, 0 disables the limit.
+        """
+        self.paginator = paginator
+        self.max_tokens = max_tokens
+
+    def fit(self, name: str, value: Any, summarize: Callable[[Any], Any] | None = None, reserve: int = 0) -> Any:
+        """
+        Returns value unchanged when it fits the budget, otherwise its summary
+        or its truncated detail.
+        Args:
+            name (str): Tool name, names the snapshots.
+            value: The tool result.
+            summarize (Callable, optional): Returns a summary view of value.
+            reserve (int): Tokens kept free for text the caller adds afterwards.
+        """
+        budget = self.max_tokens - reserve
+        if self.max_tokens <= 0 or estimate_tokens(value) <= budget:
+            return value
+        if isinstance(value, str):
+            return self._fit_text(name, value, budget)
+        if isinstance(value, list):
+            value = {"Items": value}
+        if not isinstance(value, dict):
+            return value
+        list_key = _largest_list(value)
+        handle = None
+        if list_key is not None:
+            snapshot_id = self.paginator.snapshot(name, value[list_key])
+            handle = f"{name}/{list_key}/{snapshot_id}:0"
+        if summarize is not None:
+            summary = summarize(value)
+            if estimate_tokens(summary) <= budget:
+                return {
+                    "Summary": summary,
+                    "Continuation": handle,
+                    "Note": "Full result is too large, showing a summary. "
+                    "Call next_page with Continuation to read the detail.",
+                }
+        if list_key is None:
+            return self._fit_nested_text(name, value, budget)
+        context = {key: v for key, v in value.items() if key != list_key}
+        note = "Result is too large, showing the first items only."
+        skeleton = {**context, list_key: [], "Total": len(value[list_key]), "Offset": 0, "Continuation": handle, "Note": note}
+        page = self._page(list_key, value[list_key], 0, name, snapshot_id, budget - estimate_tokens(skeleton))
+        return {**context, **page, "Note": note}
+
+    def next_page(self, handle: str) -> dict:
+        """
+        Returns the items (or text) following a continuation handle, as much as fits the budget.
+        """
+        name, list_key, position = handle.split("/", 2)
+        snapshot_id, _, offset = position.partition(":")
+        items = self.paginator.items(name, snapshot_id)
+        if items is None:
+            raise ValueError("Continuation expired, call the original tool again.")
+        skeleton = {list_key: [], "Total": len(items), "Offset": offset, "Continuation": handle}
+        page = self._page(list_key, items, int(offset or 0), name, snapshot_id, self.max_tokens - estimate_tokens(skeleton))
+        if list_key == TEXT:
+            page[TEXT] = "".join(page[TEXT])
+        return page
+
+    def _page(self, list_key: str, items: list, offset: int, name: str, snapshot_id: str, available: int) -> dict:
+        page = []
+        end = offset
+        while end < len(items):
+            item = items[end]
+            cost = estimate_tokens(item)
+            if cost > available:
+                if end > offset:
+                    break
+                # a page holds at least one item, one over the budget has its longest text cut
+                # (lines of text are already split to fit)
+                if isinstance(item, dict) and list_key != TEXT:
+                    item = self._fit_nested_text(name, item, available)
+                elif isinstance(item, str) and list_key != TEXT:
+                    item = self._fit_text(name, item, available)
+            page.append(item)
+            available -= cost
+            end += 1
+        return {
+            list_key: page,
+            "Total": len(items),
+            "Offset": offset,
+            "Continuation": f"{name}/{list_key}/{snapshot_id}:{end}" if end < len(items) else None,
+        }
+
+    def _text_page(self, name: str, text: str, available: int) -> tuple[str, str]:
+        """
+        Keeps the lines of text as a snapshot, returns (the lines which fit, continuation handle).
+        """
+        # lines longer than a page are split, a page holds at least one item
+        width = max(available * CHARS_PER_TOKEN // 2, 80)
+        lines = [
+            line[start : start + width]
+            for line in text.splitlines(keepends=True)
+            for start in range(0, len(line), width)
+        ]
+        snapshot_id = self.paginator.snapshot(name, lines)
+        page = self._page(TEXT, lines, 0, name, snapshot_id, available)
+        return "".join(page[TEXT]), page["Continuation"]
+
+    def _fit_text(self, name: str, text: str, budget: int) -> str:
+        note = "\n... (truncated, result is too large; call next_page with continuation {} for the rest)"
+        # the handle is about 40 characters
+        head, handle = self._text_page(name, text, budget - estimate_tokens(note) - 10)
+        return head.rstrip("\n") + note.format(handle)
+
+    def _fit_nested_text(self, name: str, value: dict, budget: int) -> Any:
+        found = _largest_text(value)
+        if found is None:
+            return self._fit_text(name, encode(value).decode("utf-8"), budget)
+        _, path = found
+        context = _replaced(value, path, "")
+        note = "Result is too large, showing the start of " + ".".join(path) + " only."
+        used = estimate_tokens({**context, "Continuation": f"{name}/{TEXT}/{'0' * 16}:0", "Note": note})
+        head, handle = self._text_page(name, _get(value, path), budget - used)
+        return {**_replaced(value, path, head), "Continuation": handle, "Note": note}
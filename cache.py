@@ -0,0 +1,302 @@
+from collections import OrderedDict
+from typing import Any
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESS_MIN_BYTES = 256  # smaller values are stored as they are
+
+
+def encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode(data: bytes) -> Any:
+    return json.loads(decompress(data))
+
+
+def compress(data: bytes) -> bytes:
+    """
+    Compresses encoded data for storage, with zstd when the zstandard package
+    is installed and zlib otherwise. Small values are returned unchanged.
+    """
+    if len(data) < COMPRESS_MIN_BYTES:
+        return data
+    if ZSTD_AVAILABLE:
+        return zstandard.compress(data, 3)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Inverse of compress, recognizes zstd and zlib frames by their header, so
+    uncompressed (and previously stored) JSON passes through.
+    """
+    if data[:4] == ZSTD_MAGIC:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd compressed data, but the zstandard package is not installed")
+        return zstandard.decompress(data)
+    if data[:1] == b"\x78":
+        return zlib.decompress(data)
+    return data
+
+
+class CacheBackend:
+    """
+    Interface of the Client response cache.
+
+    Values are JSON serializable API responses. Backends store them encoded,
+    so sizes are exact byte counts and every get returns a fresh copy.
+    Keys are plain strings; invalidate removes every key with a given prefix.
+    """
+
+    def get(self, key: str) -> Any | None:
+        """
+        Returns the cached value, or None when missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Stores a value for ttl seconds.
+        """
+        raise NotImplementedError
+
+    def invalidate(self, prefix: str) -> None:
+        """
+        Removes all keys starting with prefix.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """
+        Removes everything.
+        """
+        raise NotImplementedError
+
+    @property
+    def size_bytes(self) -> int:
+        """
+        Total size of the stored values in bytes.
+        """
+        raise NotImplementedError
+
+
+class MemoryLRUCache(CacheBackend):
+    """
+    Per-process LRU cache bounded by the total size of the stored values.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        return decode(data)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = encode(value)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.time() + ttl, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache shared by all processes on one machine, stored in an SQLite database
+    in WAL mode. Every process reads and writes the same file, so an
+    invalidation done by one worker is seen by all of them.
+    Entries are evicted least recently used first when max_bytes is exceeded.
+    Values are stored compressed (see compress), max_bytes counts compressed bytes.
+
+    Reads do not write: access times of hits are collected in memory and
+    written with the next set, or in one batch every touch_interval seconds,
+    so concurrent readers do not queue on the WAL write lock. The total size
+    is kept in a meta row maintained by triggers in the same transaction as
+    every change, instead of summing all entries on each write.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, touch_interval: float = 5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self._touched_at = time.monotonic()
+        # cached responses are private (marks, messages), readable by the owner
+        # only; SQLite creates the -wal and -shm files with the same mode
+        os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                "expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # databases created before the meta row start from the current total
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta (name, value) "
+                "SELECT 'size', COALESCE(SUM(size), 0) FROM cache"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache BEGIN "
+                "UPDATE meta SET value = value + NEW.size WHERE name = 'size'; END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache BEGIN "
+                "UPDATE meta SET value = value - OLD.size WHERE name = 'size'; END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_update AFTER UPDATE OF size ON cache BEGIN "
+                "UPDATE meta SET value = value + NEW.size - OLD.size WHERE name = 'size'; END"
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                # expired entries are deleted by the next set
+                return None
+            self._touched[key] = now
+            if time.monotonic() - self._touched_at >= self.touch_interval:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._flush_touched()
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+        return decode(row[0])
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._db.executemany(
+                "UPDATE cache SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched = {}
+        self._touched_at = time.monotonic()
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = compress(encode(value))
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._flush_touched()
+                self._db.execute(
+                    "INSERT INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "expires = excluded.expires, accessed = excluded.accessed",
+                    (key, data, len(data), now + ttl, now),
+                )
+                self._evict(now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        excess = self._size() - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def invalidate(self, prefix: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM cache")
+
+    def _size(self) -> int:
+        return self._db.execute("SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._size()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._touched:
+                self._db.execute("BEGIN IMMEDIATE")
+                self._flush_touched()
+                self._db.execute("COMMIT")
+            self._db.close()
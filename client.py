@@ -1,30 +1,160 @@
 from typing import Any, Callable
-from datetime import date as dt_date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as dt_date, timedelta
+from importlib.util import find_spec
+from cache import CacheBackend
+from snapshots import SnapshotStore, is_stale, mark_stale
 import filetype
+import functools
 import httpx
 import logging
 import pyrfc6266
 import base64
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401  # needed by httpx for HTTP/2
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# response encodings in order of preference; br and zstd need the brotli and
+# zstandard packages, which httpx uses to decode them when installed
+PREFERRED_ENCODINGS = ("zstd", "br", "gzip", "deflate")
+# packages httpx decodes a coding with, any of them will do; none for zlib ones
+DECODER_PACKAGES = {"zstd": ("zstandard",), "br": ("brotli", "brotlicffi"), "gzip": (), "deflate": ()}
+
+
+def supported_encodings() -> str:
+    """
+    Accept-Encoding value listing the content codings httpx can decode here.
+    """
+    return ", ".join(
+        encoding
+        for encoding in PREFERRED_ENCODINGS
+        if not DECODER_PACKAGES[encoding] or any(find_spec(package) for package in DECODER_PACKAGES[encoding])
+    )
+
+
+# seconds for which responses are served from the cache
+TTL_SHORT = 60  # counters of new/unread items
+TTL_DEFAULT = 300
+TTL_LONG = 24 * 60 * 60  # user, subjects, permanent timetable
+TTL_THEMES = 6 * 60 * 60  # lesson topics, filled in by teachers after lessons
+TTL_STALE = 30  # responses served from a snapshot while upstream is failing
+
+
+def _week(date: str | None = None) -> str:
+    """
+    Monday (YYYY-MM-DD) of the week of date, today by default.
+    """
+    day = dt_date.fromisoformat(date[:10]) if date else dt_date.today()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def _error_text(result: Any) -> str | None:
+    """
+    Short description of a failed call for per-item results of bulk methods.
+    """
+    if not isinstance(result, Exception):
+        return None
+    if isinstance(result, httpx.HTTPStatusError):
+        return f"HTTP {result.response.status_code}"
+    return str(result) or type(result).__name__
+
 
 class Client:
-    def __init__(self, pwd, user, base_url):
+    def __init__(
+        self,
+        pwd,
+        user,
+        base_url,
+        http2: bool = False,
+        max_connections: int = 10,
+        cache: CacheBackend | None = None,
+        snapshots: SnapshotStore | None = None,
+        timeout: float = 5.0,
+        degraded_cooldown: float = 30.0,
+        degraded_after: int = 3,
+        accept_encoding: str | None = None,
+    ):
         """
         Initialize the Client with user credentials and base API URL.
-        Obtains access and refresh tokens for authentication.
+        The client logs in lazily with its first request (see login), so
+        creating it does not wait for the school server.
+
+        All requests go through one pooled httpx.Client, so concurrent calls
+        (see gather) reuse connections to the school host. With http2=True the
+        pool negotiates HTTP/2 via ALPN and multiplexes parallel requests over
+        a single connection; servers which do not offer h2 are served over
+        HTTP/1.1 automatically.
+
+        GET responses are kept in the optional cache backend, namespaced by
+        account, and write methods invalidate the entries they change.
+
+        With a snapshot store the last good response of every endpoint is kept
+        on disk. When the school server fails or times out, the snapshot is
+        returned with "Stale" metadata. timeout applies to each phase of a
+        request (connect, write, every read, waiting for a pooled connection)
+        rather than to the request as a whole. After
+        degraded_after consecutive failures the server is considered down and
+        for degraded_cooldown seconds further calls with a snapshot skip it
+        entirely; a single slow or failing request does not.
+
+        Responses are requested compressed with the best content coding
+        available (zstd, br, gzip, deflate), or with accept_encoding, e.g.
+        "identity" to turn compression off.
         """
         self.pwd: str = pwd
         self.user: str = user
         self.base_url: str = base_url
-        self.access_token: str
-        self.refresh_token: str
-        self.access_token, self.refresh_token = self._get_access_token()
-        self.headers: dict[str, str] = {
-            "Authorization": f"Bearer {self.access_token}",
-        }
+        self.max_connections: int = max_connections
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1.")
+        self.http2: bool = http2 and HTTP2_AVAILABLE
+        self.accept_encoding: str = accept_encoding or supported_encodings()
+        self.http: httpx.Client = httpx.Client(
+            http2=self.http2,
+            headers={"Accept-Encoding": self.accept_encoding},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._token_lock = threading.Lock()
+        self.cache: CacheBackend | None = cache
+        self.cache_namespace: str = f"{user}@{base_url}|"
+        self.snapshots: SnapshotStore | None = snapshots
+        self.degraded_cooldown: float = degraded_cooldown
+        self.degraded_after: int = max(1, degraded_after)
+        self.failures: int = 0  # consecutive upstream failures
+        self._failures_lock = threading.Lock()
+        self.degraded_until: float = 0.0
+        self.degraded_reason: str = ""
+        self.access_token: str | None = None
+        self.refresh_token: str | None = None
+        self.login_error: str | None = None  # why the last login failed
+        self.headers: dict[str, str] = {}
+
+    def login(self) -> None:
+        """
+        Obtains access and refresh tokens unless the client is logged in already.
+        Called by the first request, or ahead of it by a warm-up.
+        """
+        with self._token_lock:
+            if self.access_token is None:
+                try:
+                    self.set_tokens()
+                except Exception as e:
+                    self.login_error = _error_text(e) or "login failed"
+                    raise
+                self.login_error = None
 
     def set_tokens(self):
         """
@@ -39,7 +169,7 @@ class Client:
         Returns:
             Tuple of (access_token, refresh_token)
         """
-        response = httpx.post(
+        response = self.http.post(
             self.base_url + "/api/login",
             data={
                 "client_id": "ANDR",
@@ -49,6 +179,7 @@ class Client:
             },
             headers={},
         )
+        response.raise_for_status()
 
         access_token = response.json().get("access_token")
         refresh_token = response.json().get("refresh_token")
@@ -62,7 +193,7 @@ class Client:
         """
         Updates access and refresh tokens using the current refresh token.
         """
-        response = httpx.post(
+        response = self.http.post(
             self.base_url + "/api/login",
             data={
                 "client_id": "ANDR",
@@ -71,6 +202,7 @@ class Client:
             },
             headers={},
         )
+        response.raise_for_status()
 
         self.access_token = response.json().get("access_token")
         self.refresh_token = response.json().get("refresh_token")
@@ -78,16 +210,23 @@ class Client:
 
     def handle_login(function):
         """
-        Decorator to handle automatic token refresh on 401 errors.
+        Decorator to log in on first use and refresh the tokens on 401 errors.
         """
 
+        @functools.wraps(function)
         def wrapper(self, *args: Any, **kwargs: Any) -> Callable[..., Any]:
+            if self.access_token is None:
+                self.login()
+            used_token = self.access_token
             try:
                 return function(self, *args, **kwargs)
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 401:
-                    logger.info("Access token expired, refreshing...")
-                    self.update_tokens_with_refresh_token()
+                    # concurrent calls share the tokens, refresh only once
+                    with self._token_lock:
+                        if self.access_token == used_token:
+                            logger.info("Access token expired, refreshing...")
+                            self.update_tokens_with_refresh_token()
                     return function(self, *args, **kwargs)
                 else:
                     raise e
@@ -96,6 +235,134 @@ class Client:
 
         return wrapper
 
+    def cached(ttl: float):
+        """
+        Decorator to serve responses from the cache backend for ttl seconds.
+        The cache key is the method name followed by its arguments.
+        """
+
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+                if self.cache is None:
+                    return function(self, *args, **kwargs)
+                key = self._cache_key(function.__name__, *args, *kwargs.values())
+                value = self.cache.get(key)
+                if value is not None:
+                    return value
+                value = function(self, *args, **kwargs)
+                self.cache.set(key, value, min(ttl, TTL_STALE) if is_stale(value) else ttl)
+                return value
+
+            return wrapper
+
+        return decorator
+
+    def with_snapshot(function):
+        """
+        Decorator to keep the last good response on disk and serve it when
+        the school server fails (5xx, 429, timeout, connection error).
+        """
+
+        @functools.wraps(function)
+        def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            if self.snapshots is None:
+                return function(self, *args, **kwargs)
+            key = self._snapshot_key(function.__name__, *args, *kwargs.values())
+            if time.monotonic() < self.degraded_until:
+                snapshot = self.snapshots.load(key)
+                if snapshot is not None:
+                    return mark_stale(*snapshot, f"upstream degraded: {self.degraded_reason}")
+            try:
+                value = function(self, *args, **kwargs)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500 and e.response.status_code != 429:
+                    raise
+                reason = _error_text(e) if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+                with self._failures_lock:
+                    self.failures += 1
+                    if self.failures >= self.degraded_after:
+                        self.degraded_until = time.monotonic() + self.degraded_cooldown
+                        self.degraded_reason = reason
+                snapshot = self.snapshots.load(key)
+                if snapshot is None:
+                    raise
+                logger.warning("Serving %s from snapshot: %s", function.__name__, reason)
+                return mark_stale(*snapshot, reason)
+            with self._failures_lock:
+                self.failures = 0
+                self.degraded_until = 0.0
+            self.snapshots.save(key, value)
+            return value
+
+        return wrapper
+
+    def _cache_key(self, name: str, *args: Any) -> str:
+        return self.cache_namespace + name + ":" + "".join(f"{a}:" for a in args if a is not None)
+
+    def _snapshot_key(self, name: str, *args: Any) -> str:
+        # the actual timetable is returned per week, whichever day is asked for
+        if name == "get_actual_timetable":
+            try:
+                args = (_week(*args),)
+            except ValueError:
+                pass  # left to the server to reject
+        return self._cache_key(name, *args)
+
+    def invalidate(self, *names: str) -> None:
+        """
+        Drops cached responses of this account.
+        Args:
+            names: Method names ("get_marks") or method names with arguments
+                ("get_komens_message_by_id:123").
+        """
+        if self.cache is None:
+            return
+        for name in names:
+            self.cache.invalidate(self._cache_key(*name.split(":")))
+
+    def gather(
+        self,
+        calls: list[Callable[[], Any]],
+        max_workers: int | None = None,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """
+        Runs independent client calls concurrently over the pooled transport.
+        Args:
+            calls (list): Zero-argument callables, e.g. lambda: self.get_marks().
+            max_workers (int, optional): Concurrency limit, clamped to 1..max_connections.
+                Defaults to max_connections.
+            return_exceptions (bool): Return raised exceptions in place of results
+                instead of re-raising the first one.
+        Returns:
+            list: Results in the same order as calls.
+        """
+        if not calls:
+            return []
+
+        def run(call: Callable[[], Any]) -> Any:
+            try:
+                return call()
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        # more threads than pooled connections would only queue on the pool
+        # (and run into its timeout), fewer than one is not a limit
+        workers = max(1, min(max_workers or self.max_connections, self.max_connections, len(calls)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, calls))
+
+    def close(self) -> None:
+        """
+        Closes pooled connections.
+        """
+        self.http.close()
+
+    @cached(TTL_LONG)
+    @with_snapshot
     @handle_login
     def get_permanent_timetable(self) -> dict:
         """
@@ -112,13 +379,15 @@ class Client:
                 ]
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             self.base_url + "/api/3/timetable/permanent",
             headers=self.headers,
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_actual_timetable(self, date: str = None) -> dict:
         """
@@ -139,13 +408,25 @@ class Client:
         """
         if date is None:
             date = dt_date.today().strftime("%Y-%m-%d")
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/timetable/actual?date={date}",
             headers=self.headers,
         )
         response.raise_for_status()
         return response.json()
 
+    def get_actual_timetables(self, dates: list[str]) -> list[dict]:
+        """
+        Fetches actual timetables for several weeks concurrently.
+        Args:
+            dates (list[str]): One date (YYYY-MM-DD) from each requested week.
+        Returns:
+            list[dict]: Timetables in the same order as dates.
+        """
+        return self.gather([lambda d=d: self.get_actual_timetable(d) for d in dates])
+
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_absence_student(self) -> dict:
         """
@@ -157,12 +438,14 @@ class Client:
                 "AbsencesPerSubject": [ {...} ]
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/absence/student", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_events(self) -> dict:
         """
@@ -172,10 +455,12 @@ class Client:
                 "Events": [ {...} ]
             }
         """
-        response = httpx.get(f"{self.base_url}/api/3/events", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/events", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_events_my(self) -> dict:
         """
@@ -185,10 +470,12 @@ class Client:
                 "Events": [ {...} ]
             }
         """
-        response = httpx.get(f"{self.base_url}/api/3/events/my", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/events/my", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_events_public(self) -> dict:
         """
@@ -198,12 +485,14 @@ class Client:
                 "Events": [ {...} ]
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/events/public", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_homeworks(self) -> dict:
         """
@@ -213,10 +502,12 @@ class Client:
                 "Homeworks": [ {...} ]
             }
         """
-        response = httpx.get(f"{self.base_url}/api/3/homeworks", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/homeworks", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_SHORT)
+    @with_snapshot
     @handle_login
     def get_homeworks_count_actual(self) -> dict:
         """
@@ -224,7 +515,7 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/homeworks/count-actual", headers=self.headers
         )
         response.raise_for_status()
@@ -239,7 +530,7 @@ class Client:
         Returns:
             dict: {filename: str, content: base64 encoded str}
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/attachment/{id}", headers=self.headers
         )
         response.raise_for_status()
@@ -249,6 +540,8 @@ class Client:
         mime_type = filetype.guess(response.content).mime
         return {"filename": filename, "content": base64_data, "mime_type": mime_type}
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_komens_message_by_id(self, id: str) -> dict:
         """
@@ -260,12 +553,14 @@ class Client:
                 "Message": {...}
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/message/{id}", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_LONG)
+    @with_snapshot
     @handle_login
     def get_komens_message_types(self) -> dict:
         """
@@ -273,12 +568,14 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/message-types", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_komens_messages_noticeboard(self) -> dict:
         """
@@ -288,12 +585,14 @@ class Client:
                 "Messages": [ {...} ]
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/messages/noticeboard", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_SHORT)
+    @with_snapshot
     @handle_login
     def get_komens_messages_noticeboard_unread(self) -> dict:
         """
@@ -301,13 +600,15 @@ class Client:
         Returns:
             dict: int (count of unread messages)
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/messages/noticeboard/unread",
             headers=self.headers,
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_komens_messages_rating(self) -> dict:
         """
@@ -315,12 +616,14 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/messages/rating", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def post_komens_messages_received(self) -> dict:
         """
@@ -330,12 +633,14 @@ class Client:
                 "Messages": [ {...} ]
             }
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/messages/received", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_komens_messages_received_id(self, id: str) -> dict:
         """
@@ -347,12 +652,39 @@ class Client:
                 "Message": {...}
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/messages/received/{id}", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    def get_komens_messages_received_ids(self, ids: list[str], max_workers: int | None = None) -> list[dict]:
+        """
+        Fetches several received Komens messages concurrently.
+        Args:
+            ids (list[str]): Message IDs.
+            max_workers (int, optional): Concurrency limit. Defaults to max_connections.
+        Returns:
+            list[dict]: [{"Id": str, "Ok": bool, "Message": {...} | None, "Error": str | None}, ...]
+                in the order of ids.
+        """
+        results = self.gather(
+            [lambda id=id: self.get_komens_messages_received_id(id) for id in ids],
+            max_workers=max_workers,
+            return_exceptions=True,
+        )
+        return [
+            {
+                "Id": id,
+                "Ok": not isinstance(result, Exception),
+                "Message": None if isinstance(result, Exception) else result.get("Message"),
+                "Error": _error_text(result),
+            }
+            for id, result in zip(ids, results)
+        ]
+
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_komens_messages_sent_id(self, id: str) -> dict:
         """
@@ -364,12 +696,14 @@ class Client:
                 "Message": {...}
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/messages/sent/{id}", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_SHORT)
+    @with_snapshot
     @handle_login
     def get_komens_messages_received_unread(self) -> dict:
         """
@@ -377,13 +711,15 @@ class Client:
         Returns:
             dict: int (count of unread messages)
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/komens/messages/received/unread",
             headers=self.headers,
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def post_komens_messages_sent(self) -> dict:
         """
@@ -393,12 +729,14 @@ class Client:
                 "Messages": [ {...} ]
             }
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/messages/sent", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_marks(self) -> dict:
         """
@@ -408,10 +746,12 @@ class Client:
                 "Subjects": [ {...} ]
             }
         """
-        response = httpx.get(f"{self.base_url}/api/3/marks", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/marks", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_SHORT)
+    @with_snapshot
     @handle_login
     def get_marks_count_new(self) -> dict:
         """
@@ -419,12 +759,14 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/marks/count-new", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_marks_final(self) -> dict:
         """
@@ -432,10 +774,12 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(f"{self.base_url}/api/3/marks/final", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/marks/final", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_marks_measures(self) -> dict:
         """
@@ -443,12 +787,14 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/marks/measures", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_payments_classfund(self) -> dict:
         """
@@ -458,12 +804,14 @@ class Client:
                 "MonthlyData": [ {...} ]
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/payments/classfund", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_LONG)
+    @with_snapshot
     @handle_login
     def get_payments_classfund_paymentsinfo(self) -> dict:
         """
@@ -478,13 +826,15 @@ class Client:
                 "Message": str
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/payments/classfund/paymentsinfo",
             headers=self.headers,
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_payments_classfund_summary(self) -> dict:
         """
@@ -496,12 +846,14 @@ class Client:
                 "Spent": float
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/payments/classfund/summary", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_LONG)
+    @with_snapshot
     @handle_login
     def get_subjects(self) -> dict:
         """
@@ -511,10 +863,12 @@ class Client:
                 "Subjects": [ {...} ]
             }
         """
-        response = httpx.get(f"{self.base_url}/api/3/subjects", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/subjects", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_THEMES)
+    @with_snapshot
     @handle_login
     def get_subjects_themes_id(self, id: str) -> dict:
         """
@@ -524,12 +878,48 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/subjects/themes/{id}", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    def get_subjects_themes(self, ids: list[str] | None = None, max_workers: int | None = None) -> list[dict]:
+        """
+        Fetches lesson topics of several subjects concurrently.
+        Args:
+            ids (list[str], optional): Subject IDs. Defaults to all subjects of get_subjects.
+            max_workers (int, optional): Concurrency limit. Defaults to max_connections.
+        Returns:
+            list[dict]: [{"SubjectId": str, "Subject": str | None, "Ok": bool,
+                "Themes": [ {...} ], "Error": str | None}, ...] in the order of ids.
+                Themes served from a snapshot carry its "Stale" metadata.
+        """
+        names = {
+            str(subject.get("SubjectID")).strip(): (subject.get("SubjectName") or "").strip()
+            for subject in self.get_subjects().get("Subjects") or []
+        }
+        if ids is None:
+            ids = list(names)
+        results = self.gather(
+            [lambda id=id: self.get_subjects_themes_id(id) for id in ids],
+            max_workers=max_workers,
+            return_exceptions=True,
+        )
+        return [
+            {
+                "SubjectId": id,
+                "Subject": names.get(id),
+                "Ok": not isinstance(result, Exception),
+                "Themes": [] if isinstance(result, Exception) else result.get("Themes") or [],
+                "Error": _error_text(result),
+                **({"Stale": result["Stale"]} if is_stale(result) else {}),
+            }
+            for id, result in zip(ids, results)
+        ]
+
+    @cached(TTL_DEFAULT)
+    @with_snapshot
     @handle_login
     def get_substitutions(self) -> dict:
         """
@@ -541,12 +931,14 @@ class Client:
                 "Changes": [ {...} ]
             }
         """
-        response = httpx.get(
+        response = self.http.get(
             f"{self.base_url}/api/3/substitutions", headers=self.headers
         )
         response.raise_for_status()
         return response.json()
 
+    @cached(TTL_LONG)
+    @with_snapshot
     @handle_login
     def get_user(self) -> dict:
         """
@@ -566,7 +958,7 @@ class Client:
                 "SettingModules": {...}
             }
         """
-        response = httpx.get(f"{self.base_url}/api/3/user", headers=self.headers)
+        response = self.http.get(f"{self.base_url}/api/3/user", headers=self.headers)
         response.raise_for_status()
         return response.json()
 
@@ -628,10 +1020,11 @@ class Client:
                 }
             }
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/message", headers=self.headers, json=data
         )
         response.raise_for_status()
+        self.invalidate("post_komens_messages_sent")
         return response.json()
 
     @handle_login
@@ -643,12 +1036,39 @@ class Client:
         Returns:
             dict: Empty response (HTTP 204 No Content).
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/message/{id}/mark-as-read",
             headers=self.headers,
         )
         response.raise_for_status()
-        return response.json()
+        self.invalidate(
+            "post_komens_messages_received",
+            "get_komens_messages_received_unread",
+            "get_komens_messages_noticeboard",
+            "get_komens_messages_noticeboard_unread",
+            f"get_komens_messages_received_id:{id}",
+            f"get_komens_message_by_id:{id}",
+        )
+        return response.json() if response.content else {}
+
+    def post_komens_messages_mark_as_read(self, ids: list[str], max_workers: int | None = None) -> list[dict]:
+        """
+        Marks several Komens messages as read concurrently.
+        Args:
+            ids (list[str]): Message IDs.
+            max_workers (int, optional): Concurrency limit. Defaults to max_connections.
+        Returns:
+            list[dict]: [{"Id": str, "Ok": bool, "Error": str | None}, ...] in the order of ids.
+        """
+        results = self.gather(
+            [lambda id=id: self.post_komens_message_mark_as_read(id) for id in ids],
+            max_workers=max_workers,
+            return_exceptions=True,
+        )
+        return [
+            {"Id": id, "Ok": not isinstance(result, Exception), "Error": _error_text(result)}
+            for id, result in zip(ids, results)
+        ]
 
     @handle_login
     def post_komens_message_types_edit(self, data: dict) -> dict:
@@ -659,12 +1079,13 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/message-types/edit",
             headers=self.headers,
             json=data,
         )
         response.raise_for_status()
+        self.invalidate("get_komens_message_types")
         return response.json()
 
     @handle_login
@@ -678,12 +1099,13 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/message-types/reply",
             headers=self.headers,
             json=data,
         )
         response.raise_for_status()
+        self.invalidate("get_komens_message_types", "post_komens_messages_sent")
         return response.json()
 
     @handle_login
@@ -695,12 +1117,13 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/komens/messages/apology",
             headers=self.headers,
             json=data,
         )
         response.raise_for_status()
+        self.invalidate("post_komens_messages_sent", "get_absence_student")
         return response.json()
 
     @handle_login
@@ -712,7 +1135,7 @@ class Client:
         Returns:
             dict: See Bakaláři API documentation for details (endpoint not documented in public API).
         """
-        response = httpx.post(
+        response = self.http.post(
             f"{self.base_url}/api/3/marks/what-if", headers=self.headers, json=data
         )
         response.raise_for_status()
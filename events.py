@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from typing import Callable
+import bisect
+
+from stores import RefreshingStore
+from timetable import lessons_by_day
+
+
+def _local(value: str) -> datetime:
+    # event times are Prague local time, like timetable hours
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def parse_bound(value: str, end: bool = False) -> datetime:
+    """
+    Parses a query bound, YYYY-MM-DD or an ISO datetime. A plain date as the
+    end bound means the end of that day.
+    """
+    if len(value) == 10:
+        day = datetime.fromisoformat(value)
+        return day + timedelta(days=1) if end else day
+    return _local(value)
+
+
+def _overlaps(start: datetime, end: datetime, range_start: datetime, range_end: datetime) -> bool:
+    # a point event (start == end) is [start, start], inside a range it starts in
+    if start == end:
+        return range_start <= start < range_end
+    return start < range_end and range_start < end
+
+
+class EventStore(RefreshingStore):
+    """
+    Merged, deduplicated calendar of all, my and public events.
+
+    Each source is fetched through the (cached) client, and the merged index
+    is rebuilt only when one of the sources returns different content. The
+    index is a list of event time intervals sorted by start together with a
+    running maximum of their ends, so an overlap query is two bisects plus a
+    scan over the matching intervals only. A rebuild publishes the events and
+    the interval index as one tuple, so queries never mix two versions.
+    """
+
+    def __init__(self, sources: dict[str, Callable[[], dict]], ttl: float = 60):
+        """
+        Args:
+            sources (dict): Source name -> fetch function, e.g. {"my": client.get_events_my}.
+            ttl (float): Seconds before the sources are pulled again.
+        """
+        super().__init__(ttl)
+        self.sources = sources
+        self.by_source: dict[str, dict[str, dict]] = {name: {} for name in sources}
+        # (events by id, intervals sorted by start, their starts, running max of their ends)
+        self.index: tuple[dict[str, dict], list[tuple[datetime, datetime, str]], list[datetime], list[datetime]]
+        self.index = ({}, [], [], [])
+
+    def _pull(self) -> None:
+        # fetch every source before touching the index, a failing one leaves it as it was
+        pulled = {name: fetch() for name, fetch in self.sources.items()}
+        changed = False
+        for name, response in pulled.items():
+            if self.changed(name, response):
+                events = response.get("Events") or []
+                self.by_source[name] = {event["Id"]: event for event in events if event.get("Id")}
+                changed = True
+        if changed:
+            self._build()
+
+    def _build(self) -> None:
+        events: dict[str, dict] = {}
+        for name, source in self.by_source.items():
+            for event_id, event in source.items():
+                if event_id in events:
+                    events[event_id]["Sources"].append(name)
+                else:
+                    events[event_id] = {**event, "Sources": [name]}
+        intervals = []
+        for event_id, event in events.items():
+            for event_time in event.get("EventTimes") or []:
+                if not event_time.get("StartTime"):
+                    continue
+                start = _local(event_time["StartTime"])
+                end = _local(event_time.get("EndTime") or event_time["StartTime"])
+                if event_time.get("WholeDay"):
+                    start = start.replace(hour=0, minute=0, second=0)
+                    end = end.replace(hour=0, minute=0, second=0) + timedelta(days=1)
+                intervals.append((start, max(start, end), event_id))
+        intervals.sort()
+        max_ends = []
+        latest = datetime.min
+        for _, end, _ in intervals:
+            latest = max(latest, end)
+            max_ends.append(latest)
+        self.index = (events, intervals, [start for start, _, _ in intervals], max_ends)
+
+    def between(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime, dict]]:
+        """
+        Returns (start, end, event) of all event times overlapping [start, end),
+        point events included when they fall on start.
+        """
+        self.refresh()
+        events, intervals, starts, max_ends = self.index
+        # intervals before lo end before start, intervals from hi on start at or after end
+        lo = bisect.bisect_left(max_ends, start)
+        hi = bisect.bisect_left(starts, end)
+        return [
+            (interval_start, interval_end, events[event_id])
+            for interval_start, interval_end, event_id in intervals[lo:hi]
+            if _overlaps(interval_start, interval_end, start, end)
+        ]
+
+    @staticmethod
+    def view(start: datetime, end: datetime, event: dict) -> dict:
+        """
+        Compact form of an event occurrence for tool results.
+        """
+        return {
+            "Id": event.get("Id"),
+            "Title": event.get("Title"),
+            "Type": (event.get("EventType") or {}).get("Name"),
+            "Start": start.isoformat(timespec="minutes"),
+            "End": end.isoformat(timespec="minutes"),
+            "Description": event.get("Description") or None,
+            "Sources": event.get("Sources"),
+        }
+
+    def conflicts(self, start: datetime, end: datetime, weeks: list[dict]) -> list[dict]:
+        """
+        Returns events in [start, end) which overlap lessons of the given
+        actual timetables.
+        """
+        days: dict[str, list[dict]] = {}
+        for week in weeks:
+            days.update(lessons_by_day(week)[0])
+        conflicts = []
+        for event_start, event_end, event in self.between(start, end):
+            lessons = []
+            day = event_start.date()
+            while datetime.combine(day, datetime.min.time()) < event_end:
+                midnight = datetime.combine(day, datetime.min.time())
+                for lesson in days.get(day.isoformat(), []):
+                    lesson_start = midnight + timedelta(minutes=lesson["Begin"])
+                    lesson_end = midnight + timedelta(minutes=lesson["End"])
+                    if _overlaps(event_start, event_end, lesson_start, lesson_end):
+                        lessons.append(
+                            {
+                                "Date": day.isoformat(),
+                                "Hour": lesson["Hour"],
+                                "Subject": lesson["Subject"],
+                            }
+                        )
+                day += timedelta(days=1)
+            if lessons:
+                conflicts.append({**self.view(event_start, event_end, event), "Lessons": lessons})
+        return conflicts
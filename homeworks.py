@@ -0,0 +1,128 @@
+from datetime import date
+from typing import Callable
+import bisect
+
+from stores import RefreshingStore
+
+
+def _id(homework: dict) -> str:
+    return str(homework.get("ID") or homework.get("Id") or "")
+
+
+def _due(homework: dict) -> str:
+    return (homework.get("DateEnd") or "")[:10]
+
+
+class HomeworkStore(RefreshingStore):
+    """
+    Homeworks keyed by id and kept sorted by due date.
+
+    The full list is refetched only when the actual-homework count reported
+    by the API changes or the ttl expires; otherwise queries are answered
+    from the store with a bisect over the due dates. The homeworks and their
+    order are published together as one tuple.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], dict],
+        fetch_count: Callable[[], object],
+        invalidate: Callable[[], None] | None = None,
+        ttl: float = 15 * 60,
+    ):
+        """
+        Args:
+            fetch (Callable): Returns the get_homeworks response.
+            fetch_count (Callable): Returns the get_homeworks_count_actual response.
+            invalidate (Callable, optional): Drops the cached homework list so a
+                changed count really refetches it.
+            ttl (float): Seconds after which the list is refetched anyway.
+        """
+        super().__init__(ttl)
+        self.fetch = fetch
+        self.fetch_count = fetch_count
+        self.invalidate = invalidate
+        self.count: object = None
+        self.pulled_count: object = None
+        # (homeworks by id, [(due date, id), ...] sorted)
+        self.index: tuple[dict[str, dict], list[tuple[str, str]]] = ({}, [])
+
+    def due(self) -> bool:
+        """
+        Whether the actual count changed or the ttl expired.
+        """
+        count = self.fetch_count()
+        if isinstance(count, dict):
+            # a count served from a snapshot differs by its age only
+            count = {key: value for key, value in count.items() if key != "Stale"}
+        self.pulled_count = count
+        return self.pulled_count != self.count or super().due()
+
+    def _pull(self) -> None:
+        if self.count is not None and self.invalidate is not None:
+            self.invalidate()
+        response = self.fetch()
+        if self.changed("homeworks", response):
+            self.sync(response.get("Homeworks") or [])
+        self.count = self.pulled_count
+
+    def sync(self, homeworks: list[dict]) -> None:
+        """
+        Replaces the stored homeworks with the fetched ones.
+        """
+        fetched = {_id(homework): homework for homework in homeworks if _id(homework)}
+        self.index = (fetched, sorted((_due(homework), key) for key, homework in fetched.items()))
+
+    def _range(self, start: str, end: str) -> list[dict]:
+        """
+        Homeworks due in [start, end), dates as YYYY-MM-DD.
+        """
+        homeworks, order = self.index
+        lo = bisect.bisect_left(order, (start, ""))
+        hi = bisect.bisect_left(order, (end, ""))
+        return [homeworks[key] for _, key in order[lo:hi]]
+
+    def due_between(self, start: date, end: date, subject: str | None = None) -> list[dict]:
+        """
+        Homeworks due from start to end inclusive, optionally of one subject
+        (name or abbreviation, case insensitive).
+        """
+        self.refresh()
+        homeworks = self._range(start.isoformat(), date.fromordinal(end.toordinal() + 1).isoformat())
+        if subject:
+            wanted = subject.casefold()
+            homeworks = [
+                homework
+                for homework in homeworks
+                if wanted
+                in (
+                    ((homework.get("Subject") or {}).get("Name") or "").casefold(),
+                    ((homework.get("Subject") or {}).get("Abbrev") or "").casefold(),
+                )
+            ]
+        return [self.view(homework) for homework in homeworks]
+
+    def overdue(self, today: date) -> list[dict]:
+        """
+        Homeworks past their due date which are neither done nor closed.
+        """
+        self.refresh()
+        return [
+            self.view(homework)
+            for homework in self._range("0000-00-00", today.isoformat())
+            if not homework.get("Done") and not homework.get("Closed")
+        ]
+
+    @staticmethod
+    def view(homework: dict) -> dict:
+        """
+        Compact form of a homework for tool results.
+        """
+        return {
+            "Id": _id(homework),
+            "Subject": (homework.get("Subject") or {}).get("Name"),
+            "Due": _due(homework),
+            "Content": homework.get("Content"),
+            "Done": homework.get("Done"),
+            "Closed": homework.get("Closed"),
+        }
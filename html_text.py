@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from typing import Iterable
+import hashlib
+import html
+import re
+import threading
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "table", "tr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "hr",
+}
+SKIP_TAGS = {"script", "style", "head", "title"}
+WHITESPACE = re.compile(r"\s+")
+
+
+TOKEN = re.compile(r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|<![^>]*>|([^<]+|<)", re.S)
+HREF = re.compile(r"""href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+
+
+class HTMLToText:
+    """
+    Streaming HTML to plain text converter for Komens message bodies.
+
+    Feed it chunks of HTML and read the text with close(). Paragraphs and
+    line breaks become new lines, list items become "- item" or "1. item"
+    (indented when nested) and links are kept as "text (url)".
+    Tags are tokenized with one regular expression instead of html.parser,
+    which is several times faster on typical message bodies.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.parts: list[str] = []
+        self.lists: list[list] = []  # stack of [ordered, counter]
+        self.links: list[tuple[str, int]] = []  # stack of (href, parts index)
+        self.skip = 0
+        self.pending_space = False
+
+    def feed(self, chunk: str) -> None:
+        data = self.buffer + chunk
+        # keep an unfinished tag, comment or entity for the next chunk
+        comment = data.rfind("<!--")
+        cut = comment if comment != -1 and data.find("-->", comment + 4) == -1 else data.rfind("<")
+        if (cut != -1 and data.find(">", cut) == -1) or cut == comment != -1:
+            data, self.buffer = data[:cut], data[cut:]
+        else:
+            self.buffer = ""
+            amp = data.rfind("&")
+            if amp > data.rfind(">") and ";" not in data[amp:] and len(data) - amp < 12:
+                data, self.buffer = data[:amp], data[amp:]
+        for match in TOKEN.finditer(data):
+            closing, tag, attrs, text = match.groups()
+            if text is not None:
+                self.handle_data(html.unescape(text) if "&" in text else text)
+            elif tag is not None:
+                tag = tag.lower()
+                if closing:
+                    self.handle_endtag(tag)
+                else:
+                    self.handle_starttag(tag, attrs)
+
+    def _newline(self, count: int = 1) -> None:
+        self.pending_space = False
+        trailing = 0
+        for part in reversed(self.parts):
+            if part == "\n":
+                trailing += 1
+            else:
+                break
+        if self.parts and trailing < count:
+            self.parts.extend("\n" * (count - trailing))
+
+    def handle_starttag(self, tag: str, attrs: str) -> None:
+        if tag in SKIP_TAGS:
+            self.skip += 1
+        elif tag == "br":
+            self.parts.append("\n")
+            self.pending_space = False
+        elif tag in ("ul", "ol"):
+            self._newline()
+            self.lists.append([tag == "ol", 0])
+        elif tag == "li":
+            self._newline()
+            indent = "  " * max(len(self.lists) - 1, 0)
+            if self.lists and self.lists[-1][0]:
+                self.lists[-1][1] += 1
+                self.parts.append(f"{indent}{self.lists[-1][1]}. ")
+            else:
+                self.parts.append(f"{indent}- ")
+        elif tag == "a":
+            href = HREF.search(attrs)
+            href = html.unescape(next(g for g in href.groups() if g is not None)) if href else ""
+            self.links.append((href, len(self.parts)))
+        elif tag in ("td", "th"):
+            self.parts.append(" | " if self.parts and self.parts[-1] != "\n" else "")
+        elif tag in BLOCK_TAGS:
+            self._newline(2 if tag != "tr" else 1)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS:
+            self.skip = max(self.skip - 1, 0)
+        elif tag in ("ul", "ol"):
+            if self.lists:
+                self.lists.pop()
+            self._newline()
+        elif tag == "a" and self.links:
+            href, start = self.links.pop()
+            text = "".join(self.parts[start:]).strip()
+            if href and not href.startswith(("javascript:", "#")) and href != text:
+                self.parts.append(f" ({href})")
+        elif tag in BLOCK_TAGS:
+            self._newline(2 if tag != "tr" else 1)
+
+    def handle_data(self, data: str) -> None:
+        if self.skip:
+            return
+        text = WHITESPACE.sub(" ", data)
+        if not text.strip():
+            self.pending_space = bool(text) and bool(self.parts) and self.parts[-1] != "\n"
+            return
+        if text[0] == " " or self.pending_space:
+            if self.parts and self.parts[-1] != "\n" and not self.parts[-1].endswith(" "):
+                self.parts.append(" ")
+        self.parts.append(text.strip())
+        self.pending_space = text[-1] == " "
+
+    def close(self) -> str:
+        if self.buffer:
+            # an unterminated tag at the end is text, as browsers show it
+            self.handle_data(html.unescape(self.buffer))
+            self.buffer = ""
+        lines = (line.rstrip() for line in "".join(self.parts).split("\n"))
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def html_to_text(html: str | Iterable[str]) -> str:
+    """
+    Converts HTML (a string or an iterable of chunks) to plain text.
+    """
+    parser = HTMLToText()
+    for chunk in [html] if isinstance(html, str) else html:
+        parser.feed(chunk)
+    return parser.close()
+
+
+class MessageTextCache:
+    """
+    Memoizes converted message bodies by message id and content hash, so an
+    edited message is converted again while repeated reads are free.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def text(self, message_id: str, html: str) -> str:
+        key = (message_id, hashlib.sha1(html.encode("utf-8")).hexdigest())
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                return text
+        text = html_to_text(html)
+        with self._lock:
+            self._entries[key] = text
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return text
+
+    def convert(self, message: dict) -> dict:
+        """
+        Returns a copy of a Komens message with its Text converted to plain text.
+        """
+        if not message or not isinstance(message.get("Text"), str):
+            return message
+        return {**message, "Text": self.text(str(message.get("Id")), message["Text"])}
@@ -0,0 +1,394 @@
+from array import array
+from datetime import date
+from typing import Callable
+import base64
+import bisect
+import itertools
+import logging
+import operator
+import os
+import re
+import tempfile
+
+from cache import compress, decode, encode
+from stores import RefreshingStore
+
+logger = logging.getLogger(__name__)
+
+MARK = re.compile(r"^\s*([1-5])\s*(-)?\s*$")
+
+
+def mark_value(text: str | None) -> float | None:
+    """
+    Numeric value of a mark text, "2-" is 2.5. Returns None for non-numeric
+    marks (N, X, points, ...).
+    """
+    match = MARK.match(text or "")
+    if match is None:
+        return None
+    return int(match.group(1)) + (0.5 if match.group(2) else 0.0)
+
+
+def summarize_marks(marks: dict) -> dict:
+    """
+    Per-subject aggregates of a get_marks response.
+    Returns:
+        dict: {
+            "Subjects": [
+                {
+                    "Subject": str,
+                    "Count": int,
+                    "WeightedAverage": float | None,
+                    "AverageText": str,
+                    "Best": float | None,
+                    "Worst": float | None,
+                    "LastMarkDate": str | None,
+                    "New": int
+                },
+                ...
+            ]
+        }
+    """
+    subjects = []
+    for subject in marks.get("Subjects") or []:
+        values = []
+        weighted = 0.0
+        weights = 0.0
+        last = None
+        new = 0
+        for mark in subject.get("Marks") or []:
+            value = mark_value(mark.get("MarkText"))
+            if value is not None:
+                weight = mark.get("Weight") or 1
+                values.append(value)
+                weighted += value * weight
+                weights += weight
+            date = (mark.get("MarkDate") or "")[:10] or None
+            if date and (last is None or date > last):
+                last = date
+            new += bool(mark.get("IsNew"))
+        subjects.append(
+            {
+                "Subject": (subject.get("Subject") or {}).get("Name", ""),
+                "Count": len(subject.get("Marks") or []),
+                "WeightedAverage": round(weighted / weights, 2) if weights else None,
+                "AverageText": subject.get("AverageText", ""),
+                "Best": min(values) if values else None,
+                "Worst": max(values) if values else None,
+                "LastMarkDate": last,
+                "New": new,
+            }
+        )
+    return {"Subjects": subjects}
+
+
+def period_of(day: date) -> int:
+    """
+    Half-year of a date encoded as school year * 2 + half, the first half
+    runs from September to January.
+    """
+    year = day.year if day.month >= 9 else day.year - 1
+    return year * 2 + (0 if day.month >= 9 or day.month == 1 else 1)
+
+
+def period_label(period: int) -> str:
+    year, half = divmod(period, 2)
+    return f"{year}/{(year + 1) % 100:02d}-{half + 1}"
+
+
+def parse_period(label: str) -> int:
+    """
+    Inverse of period_label, "2025/26-1" -> period.
+    """
+    year, half = label.split("/")[0], label.rsplit("-", 1)[1]
+    return int(year) * 2 + int(half) - 1
+
+
+COLUMNS = {"subject": "H", "day": "I", "value": "d", "weight": "d", "period": "H", "final": "B"}
+
+
+class MarkHistory(RefreshingStore):
+    """
+    Columnar history of numeric marks which survives syncs and restarts.
+
+    Every mark is one row across typed arrays (subject index, date ordinal,
+    value, weight, half-year period, final flag), sorted by subject and date,
+    so the marks of a subject in a date range are one contiguous slice found
+    by bisection. Aggregates run over the slices with map/sum/accumulate
+    instead of walking the nested get_marks JSON. Marks are keyed by id, a
+    sync updates edited marks and keeps marks the API no longer lists, e.g.
+    from previous school years.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], dict],
+        fetch_final: Callable[[], dict] | None = None,
+        path: str | None = None,
+        ttl: float = 60,
+    ):
+        """
+        Args:
+            fetch (Callable): Returns the get_marks response.
+            fetch_final (Callable, optional): Returns the get_marks_final response,
+                failures are ignored.
+            path (str, optional): File the history is kept in, None keeps it in memory only.
+            ttl (float): Seconds before the marks are pulled again.
+        """
+        super().__init__(ttl)
+        self.fetch = fetch
+        self.fetch_final = fetch_final
+        self.path = path
+        self.subject_ids: list[str] = []
+        self.subject_names: list[str] = []
+        self.ids: list[str] = []
+        self.columns: dict[str, array] = {name: array(code) for name, code in COLUMNS.items()}
+        self.starts: list[int] = [0]  # row range of subject i is starts[i]:starts[i + 1]
+        if path:
+            self._load()
+
+    def _subject(self, subject_id: str, name: str) -> int:
+        try:
+            index = self.subject_ids.index(subject_id)
+        except ValueError:
+            self.subject_ids.append(subject_id)
+            self.subject_names.append(name)
+            return len(self.subject_ids) - 1
+        if name:
+            self.subject_names[index] = name
+        return index
+
+    def _rows(self, marks: dict, final: dict | None) -> dict[str, tuple]:
+        rows = {}
+        sources = [(subject.get("Subject") or {}, subject.get("Marks") or [], 0) for subject in marks.get("Subjects") or []]
+        for term in (final or {}).get("CertificateTerms") or []:
+            names = {subject.get("Id"): subject for subject in term.get("Subjects") or []}
+            for mark in term.get("FinalMarks") or []:
+                sources.append((names.get(mark.get("SubjectId")) or {"Id": mark.get("SubjectId")}, [mark], 1))
+        for subject, subject_marks, is_final in sources:
+            for mark in subject_marks:
+                value = mark_value(mark.get("MarkText"))
+                mark_date = (mark.get("MarkDate") or "")[:10]
+                subject_id = str(subject.get("Id") or mark.get("SubjectId") or "").strip()
+                if value is None or not mark_date or not subject_id:
+                    continue
+                day = date.fromisoformat(mark_date)
+                mark_id = str(mark.get("Id") or f"{subject_id}:{mark_date}:{mark.get('Caption')}")
+                rows[("F:" if is_final else "") + mark_id] = (
+                    self._subject(subject_id, (subject.get("Name") or "").strip()),
+                    day.toordinal(),
+                    value,
+                    float(0 if is_final else mark.get("Weight") or 1),
+                    period_of(day),
+                    is_final,
+                )
+        return rows
+
+    def _pull(self) -> None:
+        final = None
+        if self.fetch_final is not None:
+            try:
+                final = self.fetch_final()
+            except Exception as e:
+                logger.warning("Final marks not available: %s", e)
+        self._sync(self.fetch(), final)
+
+    def sync(self, marks: dict, final: dict | None = None) -> bool:
+        """
+        Merges get_marks (and get_marks_final) responses into the history.
+        Returns:
+            bool: Whether anything changed.
+        """
+        with self._lock:
+            return self._sync(marks, final)
+
+    def _sync(self, marks: dict, final: dict | None) -> bool:
+        # both fingerprints are recorded, whichever changed
+        if not any([self.changed("marks", marks), self.changed("final", final)]):
+            return False
+        existing = dict(zip(self.ids, zip(*self.columns.values())))
+        merged = {**existing, **self._rows(marks, final)}
+        if merged == existing and len(self.starts) == len(self.subject_ids) + 1:
+            return False
+        self._build(merged)
+        if self.path:
+            self._save()
+        return True
+
+    def _build(self, rows: dict[str, tuple]) -> None:
+        ordered = sorted(rows.items(), key=lambda item: (item[1][0], item[1][1], item[0]))
+        self.ids = [mark_id for mark_id, _ in ordered]
+        for position, (name, code) in enumerate(COLUMNS.items()):
+            self.columns[name] = array(code, (row[position] for _, row in ordered))
+        subjects = self.columns["subject"]
+        self.starts = [bisect.bisect_left(subjects, index) for index in range(len(self.subject_ids) + 1)]
+
+    def _save(self) -> None:
+        data = {
+            "Subjects": [self.subject_ids, self.subject_names],
+            "Ids": self.ids,
+            "Columns": {name: base64.b64encode(column.tobytes()).decode("ascii") for name, column in self.columns.items()},
+        }
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(compress(encode(data)))
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as file:
+                data = decode(file.read())
+        except (FileNotFoundError, ValueError):
+            return
+        self.subject_ids, self.subject_names = data["Subjects"]
+        self.ids = data["Ids"]
+        for name, code in COLUMNS.items():
+            column = array(code)
+            column.frombytes(base64.b64decode(data["Columns"][name]))
+            self.columns[name] = column
+        subjects = self.columns["subject"]
+        self.starts = [bisect.bisect_left(subjects, index) for index in range(len(self.subject_ids) + 1)]
+
+    def subjects(self, subject: str | None = None) -> list[int]:
+        """
+        Indexes of all subjects, or of those matching a name, abbreviation-like
+        prefix or id (case insensitive).
+        """
+        if not subject:
+            return list(range(len(self.subject_ids)))
+        wanted = subject.casefold()
+        return [
+            index
+            for index, (subject_id, name) in enumerate(zip(self.subject_ids, self.subject_names))
+            if wanted == subject_id.casefold() or name.casefold().startswith(wanted)
+        ]
+
+    def _slice(self, index: int, since: date | None = None, until: date | None = None) -> tuple[int, int]:
+        """
+        Row range of a subject's regular marks dated from since to until inclusive.
+        """
+        lo, hi = self.starts[index], self.starts[index + 1]
+        days = self.columns["day"]
+        if since is not None:
+            lo = bisect.bisect_left(days, since.toordinal(), lo, hi)
+        if until is not None:
+            hi = bisect.bisect_right(days, until.toordinal(), lo, hi)
+        return lo, hi
+
+    def _regular(self, lo: int, hi: int) -> tuple[array, array, array]:
+        """
+        Day, value and weight columns of the regular (non-final) rows in lo:hi.
+        """
+        keep = [not flag for flag in self.columns["final"][lo:hi]]
+        return tuple(
+            array(self.columns[name].typecode, itertools.compress(self.columns[name][lo:hi], keep))
+            for name in ("day", "value", "weight")
+        )
+
+    @staticmethod
+    def _average(values: array, weights: array) -> float | None:
+        total = sum(weights)
+        return round(sum(map(operator.mul, values, weights)) / total, 2) if total else None
+
+    def trend(self, subject: str | None = None, since: date | None = None, until: date | None = None) -> list[dict]:
+        """
+        Per-subject weighted average and least-squares slope of mark values
+        over time, in mark grades per 30 days (negative means improving).
+        """
+        self.refresh()
+        with self._lock:
+            results = []
+            for index in self.subjects(subject):
+                days, values, weights = self._regular(*self._slice(index, since, until))
+                count = len(values)
+                if not count:
+                    continue
+                slope = None
+                if count > 1:
+                    mean_x, mean_y = sum(days) / count, sum(values) / count
+                    dx = [x - mean_x for x in days]
+                    sxx = sum(map(operator.mul, dx, dx))
+                    if sxx:
+                        slope = round(sum(map(operator.mul, dx, (y - mean_y for y in values))) / sxx * 30, 3)
+                half = count // 2
+                results.append(
+                    {
+                        "Subject": self.subject_names[index],
+                        "Count": count,
+                        "From": date.fromordinal(days[0]).isoformat(),
+                        "To": date.fromordinal(days[-1]).isoformat(),
+                        "WeightedAverage": self._average(values, weights),
+                        "FirstHalfAverage": self._average(values[:half], weights[:half]) if half else None,
+                        "SecondHalfAverage": self._average(values[half:], weights[half:]),
+                        "SlopePer30Days": slope,
+                        "Trend": None if slope is None else "improving" if slope < -0.05 else "worsening" if slope > 0.05 else "steady",
+                    }
+                )
+            return results
+
+    def moving_average(self, subject: str, window: int = 5, since: date | None = None) -> list[dict]:
+        """
+        Weighted moving average over the last window marks of each matching
+        subject, one point per mark.
+        """
+        window = max(window, 1)
+        self.refresh()
+        with self._lock:
+            results = []
+            for index in self.subjects(subject):
+                days, values, weights = self._regular(*self._slice(index, since))
+                if not values:
+                    continue
+                # prefix sums make every window O(1)
+                weighted = [0.0, *itertools.accumulate(map(operator.mul, values, weights))]
+                total = [0.0, *itertools.accumulate(weights)]
+                points = []
+                for position in range(len(values)):
+                    start = max(0, position + 1 - window)
+                    span = total[position + 1] - total[start]
+                    points.append(
+                        {
+                            "Date": date.fromordinal(days[position]).isoformat(),
+                            "Value": values[position],
+                            "Weight": weights[position],
+                            "MovingAverage": round((weighted[position + 1] - weighted[start]) / span, 2) if span else None,
+                        }
+                    )
+                results.append({"Subject": self.subject_names[index], "Window": window, "Points": points})
+            return results
+
+    def compare_periods(self, first: int, second: int, subject: str | None = None) -> list[dict]:
+        """
+        Per-subject weighted averages (and final marks, if any) of two
+        half-year periods, with the change from the first to the second.
+        """
+        self.refresh()
+        with self._lock:
+            results = []
+            periods = self.columns["period"]
+            for index in self.subjects(subject):
+                lo, hi = self.starts[index], self.starts[index + 1]
+                row = {"Subject": self.subject_names[index]}
+                averages = []
+                for label, period in (("First", first), ("Second", second)):
+                    keep = [p == period for p in periods[lo:hi]]
+                    rows = list(itertools.compress(range(lo, hi), keep))
+                    final = [self.columns["value"][r] for r in rows if self.columns["final"][r]]
+                    regular = [r for r in rows if not self.columns["final"][r]]
+                    average = self._average(
+                        array("d", (self.columns["value"][r] for r in regular)),
+                        array("d", (self.columns["weight"][r] for r in regular)),
+                    )
+                    averages.append(average)
+                    row[label] = {
+                        "Period": period_label(period),
+                        "Count": len(regular),
+                        "WeightedAverage": average,
+                        "FinalMark": final[-1] if final else None,
+                    }
+                if row["First"]["Count"] or row["Second"]["Count"] or row["First"]["FinalMark"] or row["Second"]["FinalMark"]:
+                    row["Change"] = round(averages[1] - averages[0], 2) if None not in averages else None
+                    results.append(row)
+            return results
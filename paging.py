@@ -0,0 +1,97 @@
+from typing import Callable
+from cache import CacheBackend, MemoryLRUCache, encode
+import hashlib
+
+
+class Paginator:
+    """
+    Cuts pages of large list responses from a snapshot of the full list.
+
+    The first page fetches the list and stores it as a snapshot in the cache
+    backend (shared between workers when the backend is). Following pages are
+    read from that snapshot only, so paging never refetches upstream and every
+    page of one walk comes from the same data. Snapshot ids are content
+    hashes, so an unchanged list keeps its id. When the client served the
+    list from a disk snapshot, its "Stale" metadata is kept with the paging
+    snapshot and repeated on every page.
+    """
+
+    def __init__(self, cache: CacheBackend | None = None, namespace: str = "", ttl: float = 15 * 60):
+        """
+        Args:
+            cache (CacheBackend, optional): Where snapshots are kept. Defaults to
+                a private in-memory cache.
+            namespace (str): Key prefix separating accounts sharing the cache.
+            ttl (float): Seconds a snapshot stays available for paging.
+        """
+        self.cache = cache if cache is not None else MemoryLRUCache(16 * 1024 * 1024)
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def snapshot(self, name: str, items: list, stale: dict | None = None) -> str:
+        """
+        Stores the full list, with the "Stale" metadata of its response if
+        any, and returns its snapshot id.
+        """
+        snapshot_id = hashlib.sha1(encode(items)).hexdigest()[:16]
+        self.cache.set(self._key(name, snapshot_id), {"Items": items, "Stale": stale}, self.ttl)
+        return snapshot_id
+
+    def page(
+        self,
+        name: str,
+        fetch: Callable[[], dict],
+        list_key: str,
+        cursor: str | None = None,
+        page_size: int = 20,
+    ) -> dict:
+        """
+        Returns one page of a list response.
+        Args:
+            name (str): Name of the list, e.g. "homeworks".
+            fetch (Callable): Fetches the full response, called for the first page only.
+            list_key (str): Key of the list in the response, e.g. "Homeworks".
+            cursor (str, optional): NextCursor of the previous page.
+            page_size (int): Number of items per page.
+        Returns:
+            dict: {
+                list_key: [ {...} ],
+                "SnapshotId": str,
+                "Total": int,
+                "NextCursor": str | None,
+                "Stale": {...}  # only when served from a disk snapshot
+            }
+        """
+        page_size = max(1, page_size)
+        if cursor:
+            snapshot_id, _, offset_text = cursor.partition(":")
+            stored = self.cache.get(self._key(name, snapshot_id))
+            if stored is None:
+                raise ValueError("Cursor expired, request the first page again without a cursor.")
+            items, stale = stored["Items"], stored["Stale"]
+            offset = int(offset_text or 0)
+        else:
+            response = fetch()
+            items, stale = response.get(list_key) or [], response.get("Stale")
+            snapshot_id = self.snapshot(name, items, stale)
+            offset = 0
+        end = offset + page_size
+        page = {
+            list_key: items[offset:end],
+            "SnapshotId": snapshot_id,
+            "Total": len(items),
+            "NextCursor": f"{snapshot_id}:{end}" if end < len(items) else None,
+        }
+        if stale:
+            page["Stale"] = stale
+        return page
+
+    def _key(self, name: str, snapshot_id: str) -> str:
+        return f"{self.namespace}snapshot|{name}:{snapshot_id}:"
+
+    def items(self, name: str, snapshot_id: str) -> list | None:
+        """
+        Returns the full list of a snapshot, or None when it expired.
+        """
+        stored = self.cache.get(self._key(name, snapshot_id))
+        return None if stored is None else stored["Items"]
@@ -0,0 +1,133 @@
+from typing import Any, Awaitable, Callable
+import cProfile
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def payload_size(value: Any) -> int:
+    """
+    Approximate size of a tool or API payload in bytes, as JSON.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class Profiler:
+    """
+    Per-call cProfile captures of selected MCP tools and Client methods.
+
+    Profiled tools are checked by name when a tool is called; Client methods
+    are wrapped on the instance only while they are selected, so with
+    nothing selected the tools and the client run exactly as without a
+    profiler. Every profiled call writes one .prof file named after the
+    tool or method and the sizes of its arguments and result, readable with
+    pstats or snakeviz.
+
+    cProfile is process-wide since Python 3.12, so a profile also contains
+    work other threads did meanwhile and only one profile is recorded at a
+    time. Calls made while another one is recorded run unprofiled, e.g.
+    Client methods called by a profiled tool show up in the tool's profile.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tools: set[str] = set()
+        self.methods: set[str] = set()
+        self._client: Any = None
+        self._active = threading.Lock()
+
+    def configure(self, tools: set[str], methods: set[str], client: Any = None) -> None:
+        """
+        Selects what to profile, "*" selects all tools. Empty sets turn profiling off.
+        Args:
+            tools (set[str]): MCP tool names.
+            methods (set[str]): Client method names, wrapped on client.
+            client (Client, optional): The client to instrument, defaults to the last one.
+        """
+        if self.tools or self.methods or tools or methods:
+            os.makedirs(self.directory, exist_ok=True)
+        self._client = client or self._client
+        if self._client is not None:
+            for name in self.methods - methods:
+                self._client.__dict__.pop(name, None)
+            for name in methods - self.methods:
+                method = getattr(self._client, name, None)
+                if callable(method):
+                    setattr(self._client, name, self._wrap(name, method))
+                else:
+                    logger.warning("Cannot profile unknown Client method %s.", name)
+        self.tools = set(tools)
+        self.methods = set(methods)
+
+    def wants_tool(self, name: str) -> bool:
+        return name in self.tools or "*" in self.tools
+
+    def _path(self, kind: str, name: str, arguments: Any, result: Any) -> str:
+        label = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        return os.path.join(
+            self.directory,
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 10**9:09d}-{kind}-{label}"
+            f"-in{payload_size(arguments)}B-out{payload_size(result)}B.prof",
+        )
+
+    def _dump(self, profile: cProfile.Profile, kind: str, name: str, arguments: Any, result: Any, elapsed: float) -> None:
+        path = self._path(kind, name, arguments, result)
+        profile.dump_stats(path)
+        logger.info("Profiled %s %s in %.1f ms: %s", kind, name, elapsed * 1000, path)
+
+    def _wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not self._active.acquire(blocking=False):
+                return method(*args, **kwargs)
+            try:
+                profile = cProfile.Profile()
+                start = time.perf_counter()
+                profile.enable()
+                try:
+                    result = method(*args, **kwargs)
+                finally:
+                    profile.disable()
+                self._dump(profile, "client", name, [args, kwargs], result, time.perf_counter() - start)
+                return result
+            finally:
+                self._active.release()
+
+        return wrapper
+
+    async def profile_tool(self, name: str, arguments: dict, call: Awaitable[Any]) -> Any:
+        """
+        Awaits a tool call under the profiler and writes its profile.
+        """
+        if not self._active.acquire(blocking=False):
+            return await call
+        try:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                result = await call
+            finally:
+                profile.disable()
+            self._dump(profile, "tool", name, arguments, result, time.perf_counter() - start)
+            return result
+        finally:
+            self._active.release()
+
+
+def parse_names(value: str | None) -> set[str]:
+    """
+    Names from a comma separated list, e.g. BK_PROFILE_TOOLS.
+    """
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
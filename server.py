@@ -1,20 +1,175 @@
 from urllib import response
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
 from mcp.server.fastmcp.resources.types import FileResource
 import os
 from dotenv import load_dotenv
 from client import Client
-from datetime import datetime
+from snapshots import SnapshotStore, oldest_stale
+from datetime import datetime, timedelta
+from typing import Callable
 import pytz
+import anyio
+import budget
+import cache
+import events
 import formatter
+import hashlib
+import homeworks
+import html_text
+import logging
+import marks
+import paging
+import profiling
+import threading
+import time
+import timetable
+import usage
+from contextlib import asynccontextmanager
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
 
 load_dotenv()
 
-mcp = FastMCP("bakalari")
+# stdio (default), streamable-http or sse
+TRANSPORT = os.getenv("BK_TRANSPORT", "stdio")
+WORKERS = int(os.getenv("BK_WORKERS", "1"))
+
+
+class BakalariMCP(FastMCP):
+    """
+    FastMCP which counts tool calls per tool, profiles the tools selected in
+    its profiler, keeps every tool result within its result budget and
+    starts the warm-up with the first request after the handshake (the
+    client's list_tools or first call), or once a network worker that
+    started logged in.
+
+    Sync tools run in worker threads, at most tool_threads at once, so a slow
+    upstream call does not block the event loop and the other sessions.
+    """
+
+    usage_stats: usage.UsageStats | None = None
+    profiler: profiling.Profiler | None = None
+    result_budget: budget.ResultBudget | None = None
+    # tools whose results are already cut to the budget
+    unbudgeted = {"next_page"}
+    warm_up = None
+    tool_threads = 10
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.summarizers: dict[str, Callable] = {}
+        self._warm_up_started = threading.Event()
+        self._tool_limiter: anyio.CapacityLimiter | None = None
+
+    def start_warm_up(self) -> None:
+        if self.warm_up is None or self._warm_up_started.is_set():
+            return
+        self._warm_up_started.set()
+        threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+    def prefetchable(self, names: list[str]) -> list:
+        """Functions of the named read tools which can be called without arguments."""
+        functions = []
+        for name in names:
+            tool = self._tool_manager.get_tool(name)
+            if tool is not None and name.startswith("get_") and not tool.parameters.get("required"):
+                functions.append(tool.fn)
+        return functions
+
+    async def list_tools(self):
+        self.start_warm_up()
+        return await super().list_tools()
+
+    async def call_tool(self, name, arguments):
+        self.start_warm_up()
+        if self.usage_stats is not None:
+            self.usage_stats.record(name)
+        call = self._call_tool(name, arguments)
+        if self.profiler is not None and self.profiler.wants_tool(name):
+            return await self.profiler.profile_tool(name, arguments, call)
+        return await call
+
+    async def _call_tool(self, name, arguments):
+        """Runs a tool and fits its result into the result budget before it is converted to content."""
+        tool = self._tool_manager.get_tool(name)
+        if tool is None or tool.is_async:
+            # unknown tools fail as in FastMCP, async tools need no thread
+            if tool is None or self.result_budget is None or name in self.unbudgeted:
+                return await super().call_tool(name, arguments)
+            result = await tool.run(arguments, context=self.get_context())
+            return self._converted(name, tool, result)
+        context = {tool.context_kwarg: self.get_context()} if tool.context_kwarg is not None else None
+        if self._tool_limiter is None:
+            self._tool_limiter = anyio.CapacityLimiter(self.tool_threads)
+        try:
+            # validates the arguments without calling the tool
+            kwargs = await tool.fn_metadata.call_fn_with_arg_validation(
+                lambda **kwargs: kwargs, False, arguments, context
+            )
+            return await anyio.to_thread.run_sync(
+                lambda: self._converted(name, tool, tool.fn(**kwargs)), limiter=self._tool_limiter
+            )
+        except Exception as e:
+            raise ToolError(f"Error executing tool {name}: {e}") from e
+
+    def _converted(self, name, tool, result):
+        if self.result_budget is not None and name not in self.unbudgeted:
+            result = self.result_budget.fit(name, result, self.summarizers.get(name))
+        return tool.fn_metadata.convert_result(result)
+
+mcp = BakalariMCP(
+    "bakalari",
+    host=os.getenv("BK_HOST", "127.0.0.1"),
+    port=int(os.getenv("BK_PORT", "8000")),
+    # sessions cannot be shared between worker processes
+    stateless_http=WORKERS > 1,
+)
 
 mcp.description = "Bakalari MCP Server, an interface to the Bakalari school information system, if user refers to messages he may refer to komens messages."
 
-client = Client(os.getenv("BK_PWD"), os.getenv("BK_USER"), os.getenv("BK_API_BASE"))
+logger = logging.getLogger(__name__)
+
+# per-user directory for everything the server keeps on disk
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bakalari-mcp")
+
+
+def create_cache():
+    """Cache backend selected by BK_CACHE: memory, sqlite (shared by workers) or none."""
+    backend = os.getenv("BK_CACHE", "sqlite" if WORKERS > 1 else "memory")
+    max_bytes = int(os.getenv("BK_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    if backend == "memory":
+        return cache.MemoryLRUCache(max_bytes)
+    if backend == "sqlite":
+        path = os.getenv("BK_CACHE_PATH", os.path.join(DATA_DIR, "cache.sqlite"))
+        return cache.SQLiteCache(path, max_bytes)
+    return None
+
+
+client = Client(
+    os.getenv("BK_PWD"),
+    os.getenv("BK_USER"),
+    os.getenv("BK_API_BASE"),
+    http2=os.getenv("BK_HTTP2", "0") == "1",
+    max_connections=int(os.getenv("BK_MAX_CONNECTIONS", "10")),
+    cache=create_cache(),
+    snapshots=(
+        SnapshotStore(
+            os.getenv("BK_SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshots"))
+        )
+        if os.getenv("BK_SNAPSHOTS", "1") == "1"
+        else None
+    ),
+    # per connect/read/write/pool wait, not a deadline of the whole request;
+    # BK_DEADLINE is the former name
+    timeout=float(os.getenv("BK_TIMEOUT", os.getenv("BK_DEADLINE", "5"))),
+    degraded_after=int(os.getenv("BK_DEGRADED_AFTER", "3")),
+    accept_encoding=os.getenv("BK_ACCEPT_ENCODING"),
+)
+# a tool thread waiting for a pooled connection would only run into the pool timeout
+mcp.tool_threads = client.max_connections
+# files kept per account in DATA_DIR are named by a hash of the account
+ACCOUNT_ID = hashlib.sha1(client.cache_namespace.encode()).hexdigest()[:12]
 
 
 def current_time():
@@ -23,6 +178,103 @@ def current_time():
     return current_time.strftime("%Y-%m-%d %H:%M:%S")
 
 
+def prague_now():
+    """Naive local time in Prague, the timezone of timetable hours."""
+    return datetime.now(pytz.timezone("Europe/Prague")).replace(tzinfo=None)
+
+
+message_texts = html_text.MessageTextCache()
+
+PAGE_SIZE = int(os.getenv("BK_PAGE_SIZE", "20"))
+BULK_CONCURRENCY = int(os.getenv("BK_BULK_CONCURRENCY", "4"))
+
+paginator = paging.Paginator(client.cache, namespace=client.cache_namespace)
+
+# the stores look the client methods up with every call, so methods wrapped
+# on the client later (see profiling) are seen by them too
+lesson_index = timetable.LessonIndex(
+    lambda: client.get_actual_timetable(), ttl=float(os.getenv("BK_TIMETABLE_TTL", "300"))
+)
+
+event_store = events.EventStore(
+    {
+        "all": lambda: client.get_events(),
+        "my": lambda: client.get_events_my(),
+        "public": lambda: client.get_events_public(),
+    }
+)
+
+homework_store = homeworks.HomeworkStore(
+    lambda: client.get_homeworks(),
+    lambda: client.get_homeworks_count_actual(),
+    invalidate=lambda: client.invalidate("get_homeworks"),
+    ttl=float(os.getenv("BK_HOMEWORK_TTL", "900")),
+)
+
+mark_history = marks.MarkHistory(
+    lambda: client.get_marks(),
+    lambda: client.get_marks_final(),
+    os.getenv(
+        "BK_MARKS_HISTORY",
+        os.path.join(DATA_DIR, f"marks-{ACCOUNT_ID}.bin"),
+    )
+    or None,
+    ttl=float(os.getenv("BK_MARKS_TTL", "60")),
+)
+
+result_budget = budget.ResultBudget(paginator, int(os.getenv("BK_TOKEN_BUDGET", "8000")))
+
+
+mcp.result_budget = result_budget
+
+
+def summarized(summarize):
+    """Decorator registering the summary view a tool result over BK_TOKEN_BUDGET degrades to first."""
+
+    def decorator(function):
+        mcp.summarizers[function.__name__] = summarize
+        return function
+
+    return decorator
+
+
+def with_stale(result, *stale):
+    """Adds the oldest of the "Stale" metadata (None for fresh data) to a tool result."""
+    stale = oldest_stale(*stale)
+    if stale:
+        result["Stale"] = stale
+    return result
+
+
+def stale_note(*responses):
+    """Line telling that timetables come from a snapshot, empty for fresh ones."""
+    stale = oldest_stale(*(response.get("Stale") for response in responses))
+    if not stale:
+        return ""
+    return f"\nSaved at {stale['SavedAt']}, the school server is not answering ({stale['Reason']})."
+
+
+def summarize_absence(absence):
+    """Absence totals instead of the per-day list."""
+    totals = {}
+    for day in absence.get("Absences") or []:
+        for key, value in day.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+    return {
+        "PercentageThreshold": absence.get("PercentageThreshold"),
+        "Days": len(absence.get("Absences") or []),
+        "Totals": totals,
+        "AbsencesPerSubject": absence.get("AbsencesPerSubject"),
+    }
+
+
+@mcp.tool()
+def next_page(continuation: str):
+    """Get the next part of a result which was too large, pass its Continuation value."""
+    return result_budget.next_page(continuation)
+
+
 # region table
 
 
@@ -35,8 +287,60 @@ def get_permanent_timetable():
 @mcp.tool()
 def get_actual_timetable():
     """Get actual timetable from Bakalari."""
-    res = formatter.dict_to_table_actual_timetable(client.get_actual_timetable())
-    return res + f"\nCurrent time is {current_time()}"
+    week = client.get_actual_timetable()
+    lesson_index.update(week)
+    res = formatter.dict_to_table_actual_timetable(week) + stale_note(week)
+    footer = f"\nCurrent time is {current_time()}"
+    # fitted here, so truncation keeps the time line
+    return result_budget.fit("get_actual_timetable", res, reserve=budget.estimate_tokens(footer)) + footer
+
+
+@mcp.tool()
+def get_actual_timetable_weeks(weeks: int = 2):
+    """Get actual timetable for this week and the following weeks from Bakalari."""
+    today = datetime.now(pytz.timezone("Europe/Prague")).date()
+    dates = [(today + timedelta(weeks=i)).strftime("%Y-%m-%d") for i in range(weeks)]
+    tables = client.get_actual_timetables(dates)
+    res = "\n\n".join(formatter.dict_to_table_actual_timetable(t) for t in tables) + stale_note(*tables)
+    footer = f"\nCurrent time is {current_time()}"
+    return result_budget.fit("get_actual_timetable_weeks", res, reserve=budget.estimate_tokens(footer)) + footer
+
+
+@mcp.tool()
+def get_timetable_changes(date: str = None):
+    """Get what is different in the actual week (date YYYY-MM-DD, default this week) compared to the permanent timetable: cancelled, added lessons, teacher, subject and room changes."""
+    permanent, actual, substitutions = client.gather(
+        [
+            client.get_permanent_timetable,
+            lambda: client.get_actual_timetable(date),
+            client.get_substitutions,
+        ]
+    )
+    return with_stale(
+        timetable.diff_timetables(permanent, actual, substitutions),
+        *(response.get("Stale") for response in (permanent, actual, substitutions)),
+    )
+
+
+@mcp.tool()
+def get_current_lesson():
+    """Get the lesson which is running right now."""
+    now = prague_now()
+    return with_stale({"Time": current_time(), "Lesson": lesson_index.now(now)}, lesson_index.stale)
+
+
+@mcp.tool()
+def get_next_lesson():
+    """Get the next lesson of this week."""
+    now = prague_now()
+    return with_stale({"Time": current_time(), "Lesson": lesson_index.next(now)}, lesson_index.stale)
+
+
+@mcp.tool()
+def get_free_periods_today():
+    """Get free periods (hours without a lesson between the first and the last lesson) today."""
+    today = prague_now().strftime("%Y-%m-%d")
+    return with_stale({"Date": today, "FreePeriods": lesson_index.free_periods(today)}, lesson_index.stale)
 
 
 # endregion table
@@ -45,9 +349,36 @@ def get_actual_timetable():
 
 
 @mcp.tool()
-def get_events():
-    """Get events from Bakalari."""
-    return client.get_events()
+def get_events(cursor: str = None, page_size: int = PAGE_SIZE):
+    """Get events from Bakalari, one page at a time. Pass NextCursor of the previous page as cursor to get the next page."""
+    return paginator.page("events", client.get_events, "Events", cursor, page_size)
+
+
+@mcp.tool()
+def get_events_between(date_from: str, date_to: str):
+    """Get all events (general, my and public merged without duplicates) between two dates YYYY-MM-DD (inclusive) or ISO datetimes."""
+    start, end = events.parse_bound(date_from), events.parse_bound(date_to, end=True)
+    occurrences = event_store.between(start, end)
+    return with_stale({"Events": [event_store.view(*occurrence) for occurrence in occurrences]}, event_store.stale)
+
+
+@mcp.tool()
+def get_event_conflicts(date_from: str = None, date_to: str = None):
+    """Get events which overlap lessons in the actual timetable between two dates YYYY-MM-DD (inclusive), default this week."""
+    monday = prague_now().date() - timedelta(days=prague_now().weekday())
+    start = events.parse_bound(date_from or monday.isoformat())
+    end = events.parse_bound(date_to or (monday + timedelta(days=6)).isoformat(), end=True)
+    week_dates = []
+    day = start.date() - timedelta(days=start.weekday())
+    while day < end.date():
+        week_dates.append(day.isoformat())
+        day += timedelta(weeks=1)
+    weeks = client.get_actual_timetables(week_dates)
+    return with_stale(
+        {"Conflicts": event_store.conflicts(start, end, weeks)},
+        event_store.stale,
+        *(week.get("Stale") for week in weeks),
+    )
 
 
 @mcp.tool()
@@ -68,9 +399,9 @@ def get_events_public():
 
 
 @mcp.tool()
-def get_homeworks():
-    """Get homeworks from Bakalari."""
-    return client.get_homeworks()
+def get_homeworks(cursor: str = None, page_size: int = PAGE_SIZE):
+    """Get homeworks from Bakalari, one page at a time. Pass NextCursor of the previous page as cursor to get the next page."""
+    return paginator.page("homeworks", client.get_homeworks, "Homeworks", cursor, page_size)
 
 
 @mcp.tool()
@@ -79,12 +410,37 @@ def get_homeworks_count_actual():
     return client.get_homeworks_count_actual()
 
 
+@mcp.tool()
+def get_homeworks_due_tomorrow():
+    """Get homeworks due tomorrow."""
+    tomorrow = prague_now().date() + timedelta(days=1)
+    return with_stale(
+        {"Date": tomorrow.isoformat(), "Homeworks": homework_store.due_between(tomorrow, tomorrow)},
+        homework_store.stale,
+    )
+
+
+@mcp.tool()
+def get_homeworks_overdue():
+    """Get homeworks past their due date which are not done yet."""
+    return with_stale({"Homeworks": homework_store.overdue(prague_now().date())}, homework_store.stale)
+
+
+@mcp.tool()
+def get_homeworks_due_this_week(subject: str = None):
+    """Get homeworks due from today to Sunday, optionally only of one subject (name or abbreviation)."""
+    today = prague_now().date()
+    sunday = today + timedelta(days=6 - today.weekday())
+    return with_stale({"Homeworks": homework_store.due_between(today, sunday, subject)}, homework_store.stale)
+
+
 # endregion homework
 
 # region marks
 
 
 @mcp.tool()
+@summarized(marks.summarize_marks)
 def get_marks():  # NOTE: sometimes misuderstood by agent
     """Get marks from Bakalari."""
     return client.get_marks()
@@ -108,6 +464,37 @@ def get_marks_measures():
     return client.get_marks_measures()
 
 
+@mcp.tool()
+def get_marks_trend(subject: str = None, date_from: str = None, date_to: str = None):
+    """Get the trend of marks per subject (or one subject) between two dates YYYY-MM-DD: weighted average, first and second half averages and slope per 30 days (1 is the best mark, negative slope means improving). Includes marks of previous school years."""
+    since = datetime.fromisoformat(date_from).date() if date_from else None
+    until = datetime.fromisoformat(date_to).date() if date_to else None
+    return with_stale({"Subjects": mark_history.trend(subject, since, until)}, mark_history.stale)
+
+
+@mcp.tool()
+def get_marks_moving_average(subject: str, window: int = 5, date_from: str = None):
+    """Get the weighted moving average over the last `window` marks of a subject, one point per mark."""
+    since = datetime.fromisoformat(date_from).date() if date_from else None
+    return with_stale({"Subjects": mark_history.moving_average(subject, window, since)}, mark_history.stale)
+
+
+@mcp.tool()
+def get_marks_period_comparison(first: str = None, second: str = None, subject: str = None):
+    """Compare weighted averages and final marks per subject between two half-year periods like "2025/26-1" (default: previous and current half-year)."""
+    current = marks.period_of(prague_now().date())
+    first_period = marks.parse_period(first) if first else current - 1
+    second_period = marks.parse_period(second) if second else current
+    return with_stale(
+        {
+            "First": marks.period_label(first_period),
+            "Second": marks.period_label(second_period),
+            "Subjects": mark_history.compare_periods(first_period, second_period, subject),
+        },
+        mark_history.stale,
+    )
+
+
 # not needed agent do it alone and automatically
 # @mcp.tool()
 # def post_marks_what_if(data):
@@ -156,6 +543,22 @@ def get_subjects_themes_id(id):
     return client.get_subjects_themes_id(id)
 
 
+@mcp.tool()
+def get_subjects_themes(date_from: str = None, date_to: str = None, subject: str = None):
+    """Get topics of lessons of all subjects (or one subject, by name or abbreviation) between two dates YYYY-MM-DD (inclusive), default the last 30 days."""
+    today = prague_now().date()
+    start = date_from or (today - timedelta(days=30)).isoformat()
+    end = date_to or today.isoformat()
+    subjects = []
+    for result in client.get_subjects_themes(max_workers=BULK_CONCURRENCY):
+        if subject and subject.casefold() not in (result["Subject"] or "").casefold() and subject != result["SubjectId"]:
+            continue
+        themes = [theme for theme in result["Themes"] if start <= (theme.get("Date") or "")[:10] <= end]
+        if themes or not result["Ok"]:
+            subjects.append({**result, "Themes": themes})
+    return {"From": start, "To": end, "Subjects": subjects}
+
+
 @mcp.tool()
 def get_substitutions():
     """Get substitutions from Bakalari."""
@@ -168,6 +571,7 @@ def get_substitutions():
 
 
 @mcp.tool()
+@summarized(summarize_absence)
 def get_absence_student():
     """Get student absences from Bakalari."""
     return client.get_absence_student()
@@ -186,16 +590,27 @@ def get_user():
 
 # region received messages
 @mcp.tool()
-def get_komens_messages_received():
-    """Get komens messages received from Bakalari."""
-
-    return client.post_komens_messages_received()
+def get_komens_messages_received(cursor: str = None, page_size: int = PAGE_SIZE):
+    """Get komens messages received from Bakalari, one page at a time. Pass NextCursor of the previous page as cursor to get the next page."""
+    return paginator.page(
+        "messages_received", client.post_komens_messages_received, "Messages", cursor, page_size
+    )
 
 
 @mcp.tool()
 def get_komens_messages_received_id(id):
     """Get komens messages received by ID from Bakalari."""
-    return client.get_komens_messages_received_id(id)
+    res = client.get_komens_messages_received_id(id)
+    return {**res, "Message": message_texts.convert(res.get("Message"))}
+
+
+@mcp.tool()
+def get_komens_messages_received_ids(ids: list[str], concurrency: int = BULK_CONCURRENCY):
+    """Get several komens messages received by their IDs from Bakalari at once."""
+    results = client.get_komens_messages_received_ids(ids, max_workers=concurrency)
+    for result in results:
+        result["Message"] = message_texts.convert(result["Message"])
+    return {"Results": results, "Failed": sum(not r["Ok"] for r in results)}
 
 
 @mcp.tool()
@@ -215,9 +630,11 @@ def get_komens_messages_sent_id(id):
 
 
 @mcp.tool()
-def get_komens_messages_sent():  # otestovat, musí se poslat zpráva prvně někomu
-    """Get komens messages sent from Bakalari."""
-    return client.post_komens_messages_sent()
+def get_komens_messages_sent(
+    cursor: str = None, page_size: int = PAGE_SIZE
+):  # otestovat, musí se poslat zpráva prvně někomu
+    """Get komens messages sent from Bakalari, one page at a time. Pass NextCursor of the previous page as cursor to get the next page."""
+    return paginator.page("messages_sent", client.post_komens_messages_sent, "Messages", cursor, page_size)
 
 
 # endregion sent messages
@@ -237,6 +654,13 @@ def post_komens_message_mark_as_read(id):
     return client.post_komens_message_mark_as_read(id)
 
 
+@mcp.tool()
+def post_komens_messages_mark_as_read(ids: list[str], concurrency: int = BULK_CONCURRENCY):
+    """Mark several komens messages as read in Bakalari at once."""
+    results = client.post_komens_messages_mark_as_read(ids, max_workers=concurrency)
+    return {"Results": results, "Failed": sum(not r["Ok"] for r in results)}
+
+
 @mcp.tool()
 def post_komens_message_types_edit(id):
     """Post komens message types edit to Bakalari."""
@@ -268,7 +692,15 @@ def get_komens_message_types():
 @mcp.tool()
 def get_komens_message_by_id(id):
     """Get komens message from Bakalari."""
-    return client.get_komens_message_by_id(id)
+    res = client.get_komens_message_by_id(id)
+    return {**res, "Message": message_texts.convert(res.get("Message"))}
+
+
+@mcp.tool()
+def get_komens_messages_noticeboard():
+    """Get komens noticeboard messages from Bakalari."""
+    res = client.get_komens_messages_noticeboard()
+    return {**res, "Messages": [message_texts.convert(m) for m in res.get("Messages") or []]}
 
 
 @mcp.tool()
@@ -299,5 +731,166 @@ def welcome_message():
     return """Jsi napomocný agent pro studenty, kteří používají školní informační systém Bakalari. Používej dostupné nástroje k získání informací o rozvrhu, známkách, absencích, domácích úkolech a dalších funkcích systému Bakalari. Odpovídej jasně a stručně na dotazy uživatelů a poskytuj přesné informace založené na datech získaných z Bakalari."""
 
 
+# region warm-up
+
+# read tools prefetched before any usage is recorded
+WARMUP_DEFAULT_TOOLS = [
+    "get_actual_timetable",
+    "get_marks",
+    "get_homeworks_due_this_week",
+    "get_komens_messages_received_unread",
+    "get_events_my",
+]
+WARMUP_TOOLS = int(os.getenv("BK_WARMUP_TOOLS", "5"))
+
+usage_path = os.getenv(
+    "BK_USAGE_PATH", os.path.join(DATA_DIR, f"usage-{ACCOUNT_ID}.json")
+)
+mcp.usage_stats = usage.UsageStats(usage_path) if usage_path else None
+
+
+def warm_up():
+    """Logs in, opens pooled connections and prefetches the most used read tools."""
+    started = time.perf_counter()
+    try:
+        client.login()
+    except Exception as e:
+        logger.warning("Warm-up login failed: %s", e)
+        return
+    names = mcp.usage_stats.most_used() if mcp.usage_stats is not None else []
+    tools = mcp.prefetchable(names)[:WARMUP_TOOLS] or mcp.prefetchable(WARMUP_DEFAULT_TOOLS)[:WARMUP_TOOLS]
+    results = client.gather(tools, return_exceptions=True)
+    failed = sum(isinstance(result, Exception) for result in results)
+    logger.info(
+        "Warm-up prefetched %d tools (%d failed) in %.2fs.", len(tools), failed, time.perf_counter() - started
+    )
+
+
+if os.getenv("BK_WARMUP", "1") == "1":
+    mcp.warm_up = warm_up
+
+
+def log_in_at_startup(stopped: threading.Event, max_backoff: float = 60.0):
+    """
+    Logs in when a network worker starts, retrying with backoff until it
+    succeeds or the worker stops, then starts the warm-up. Behind a
+    readiness-gated load balancer no MCP request arrives before /readyz
+    reports ready, so the login cannot wait for one.
+    """
+    backoff = 1.0
+    while not stopped.is_set():
+        try:
+            client.login()
+        except Exception as e:
+            logger.warning("Login failed, retrying in %.0fs: %s", backoff, e)
+            stopped.wait(backoff)
+            backoff = min(backoff * 2, max_backoff)
+            continue
+        mcp.start_warm_up()
+        return
+
+
+# endregion warm-up
+
+# region profiling
+
+mcp.profiler = profiling.Profiler(
+    os.getenv("BK_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+)
+mcp.profiler.configure(
+    profiling.parse_names(os.getenv("BK_PROFILE_TOOLS")),
+    profiling.parse_names(os.getenv("BK_PROFILE_METHODS")),
+    client,
+)
+
+if os.getenv("BK_ADMIN_TOOLS", "0") == "1":
+
+    @mcp.tool()
+    def set_profiling(tools: str = "", methods: str = ""):
+        """Admin: profile calls of the given tools and Client methods (comma separated, "*" for all tools, empty to stop). Profiles are written to BK_PROFILE_DIR."""
+        mcp.profiler.configure(profiling.parse_names(tools), profiling.parse_names(methods))
+        return {
+            "Tools": sorted(mcp.profiler.tools),
+            "Methods": sorted(mcp.profiler.methods),
+            "Directory": mcp.profiler.directory,
+        }
+
+
+# endregion profiling
+
+# region network transport
+
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(request: Request) -> Response:
+    """Liveness probe, the worker is running."""
+    return JSONResponse({"status": "ok"})
+
+
+@mcp.custom_route("/readyz", methods=["GET"])
+async def readyz(request: Request) -> Response:
+    """Readiness probe, ready once the worker logged in to Bakalari."""
+    logged_in = client.access_token is not None
+    body = {"status": "ready" if logged_in else "not ready", "pid": os.getpid(), "logged_in": logged_in}
+    if not logged_in and client.login_error:
+        body["error"] = client.login_error
+    return JSONResponse(body, status_code=200 if logged_in else 503)
+
+
+def create_app():
+    """ASGI app for the network transports, created in every uvicorn worker."""
+    app = mcp.sse_app() if TRANSPORT == "sse" else mcp.streamable_http_app()
+    lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan_with_cleanup(app):
+        async with lifespan(app):
+            stopped = threading.Event()
+            threading.Thread(target=log_in_at_startup, args=(stopped,), name="login", daemon=True).start()
+            try:
+                yield
+            finally:
+                stopped.set()
+                if mcp.usage_stats is not None:
+                    mcp.usage_stats.flush()
+                client.close()
+
+    app.router.lifespan_context = lifespan_with_cleanup
+    return app
+
+
+def run():
+    """Runs the server with the transport selected by BK_TRANSPORT."""
+    if TRANSPORT == "stdio":
+        try:
+            mcp.run()
+        finally:
+            if mcp.usage_stats is not None:
+                mcp.usage_stats.flush()
+        return
+
+    import uvicorn
+
+    workers = WORKERS
+    if TRANSPORT == "sse" and workers > 1:
+        # SSE messages are routed to the process holding the session
+        logger.warning("SSE transport does not support multiple workers, using 1.")
+        workers = 1
+    limit_concurrency = os.getenv("BK_LIMIT_CONCURRENCY")
+    uvicorn.run(
+        "server:create_app",
+        factory=True,
+        host=mcp.settings.host,
+        port=mcp.settings.port,
+        workers=workers,
+        limit_concurrency=int(limit_concurrency) if limit_concurrency else None,
+        timeout_graceful_shutdown=int(os.getenv("BK_GRACEFUL_SHUTDOWN", "30")),
+        log_level=mcp.settings.log_level.lower(),
+    )
+
+
+# endregion network transport
+
+
 if __name__ == "__main__":
-    mcp.run()
+    run()
@@ -0,0 +1,123 @@
+from typing import Any
+from cache import compress, decode, encode
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+
+class SnapshotStore:
+    """
+    Last good response of every endpoint, kept on disk per account.
+
+    The Client answers from here when the school server fails or misses its
+    deadline. Files are written atomically and only when the response
+    changed, so a steady account costs no disk writes. Files are compressed
+    with zstd, or zlib without the zstandard package.
+
+    Per-id endpoints (messages, subject themes) add a file per id, so files
+    not confirmed for max_age seconds are removed and at most max_files are
+    kept, the least recently confirmed ones going first.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_files: int = 1000,
+        max_age: float = 30 * 24 * 60 * 60,
+        prune_interval: float = 60 * 60,
+    ):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._digests: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pruned_at = float("-inf")
+        self.prune()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".snap")
+
+    def save(self, key: str, value: Any) -> None:
+        """
+        Stores the response of an endpoint.
+        """
+        data = encode(value)
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._path(key)
+        with self._lock:
+            if self._digests.get(key) == digest:
+                # unchanged, just mark it as confirmed now
+                try:
+                    os.utime(path)
+                    return
+                except FileNotFoundError:
+                    pass  # pruned or removed meanwhile, write it again
+            self._digests[key] = digest
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(compress(data))
+        os.replace(tmp, path)
+        if time.monotonic() - self._pruned_at >= self.prune_interval:
+            self.prune()
+
+    def prune(self) -> None:
+        """
+        Removes snapshots older than max_age and the oldest beyond max_files.
+        """
+        self._pruned_at = time.monotonic()
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".snap"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        files.sort(reverse=True)
+        cutoff = time.time() - self.max_age
+        for index, (mtime, path) in enumerate(files):
+            if index >= self.max_files or mtime < cutoff:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def load(self, key: str) -> tuple[Any, float] | None:
+        """
+        Returns (value, saved_at timestamp) of the last good response, or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                return decode(file.read()), os.path.getmtime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+def mark_stale(value: Any, saved_at: float, reason: str) -> dict:
+    """
+    Adds staleness metadata to a response served from a snapshot.
+    Non-dict responses (counters) are wrapped as {"Value": value}.
+    """
+    stale = {
+        "AgeSeconds": int(time.time() - saved_at),
+        "SavedAt": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(saved_at)),
+        "Reason": reason,
+    }
+    if isinstance(value, dict):
+        return {**value, "Stale": stale}
+    return {"Value": value, "Stale": stale}
+
+
+def is_stale(value: Any) -> bool:
+    return isinstance(value, dict) and "Stale" in value
+
+
+def oldest_stale(*stale: dict | None) -> dict | None:
+    """
+    The oldest of several "Stale" metadata, None entries are fresh data.
+    """
+    return max((item for item in stale if item), key=lambda item: item["AgeSeconds"], default=None)
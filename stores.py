@@ -0,0 +1,79 @@
+from typing import Any
+import hashlib
+import json
+import threading
+import time
+
+from snapshots import is_stale, oldest_stale
+
+
+def fingerprint(value: Any) -> str:
+    """
+    Content hash of an API response, independent of the order of its keys.
+    """
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class RefreshingStore:
+    """
+    Base of the stores derived from API responses (lessons, events,
+    homeworks, marks).
+
+    A store pulls its responses when due, by default once per ttl seconds,
+    and rebuilds its index only when a pulled response changed. Subclasses
+    implement _pull, which runs under the store's lock. Indexes read without
+    the lock must be published by a single assignment, e.g. as one tuple.
+    Responses the client served from a snapshot are reported by stale.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.refreshed_at: float = float("-inf")
+        self.fingerprints: dict[str, str] = {}
+        self.stale_responses: dict[str, dict] = {}  # name -> "Stale" metadata of the last pull
+        self._lock = threading.Lock()
+
+    @property
+    def stale(self) -> dict | None:
+        """
+        "Stale" metadata of the oldest snapshot the store was last built from,
+        None when all its responses were fresh.
+        """
+        return oldest_stale(*self.stale_responses.values())
+
+    def due(self) -> bool:
+        """
+        Whether the store should pull its responses again.
+        """
+        return time.monotonic() - self.refreshed_at >= self.ttl
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Pulls the responses when forced or due, and rebuilds the index if
+        they changed. A failed pull is retried with the next query.
+        """
+        with self._lock:
+            if not force and not self.due():
+                return
+            self._pull()
+            self.refreshed_at = time.monotonic()
+
+    def _pull(self) -> None:
+        raise NotImplementedError
+
+    def changed(self, name: str, value: Any) -> bool:
+        """
+        Records the fingerprint of a pulled response, whether it differs from
+        the previous one of that name. The "Stale" metadata of a response
+        served from a snapshot is recorded apart and not fingerprinted.
+        """
+        if is_stale(value):
+            self.stale_responses[name] = value["Stale"]
+            value = {key: item for key, item in value.items() if key != "Stale"}
+        else:
+            self.stale_responses.pop(name, None)
+        digest = fingerprint(value)
+        if self.fingerprints.get(name) == digest:
+            return False
+        self.fingerprints[name] = digest
+        return True
@@ -0,0 +1,83 @@
+import pytest
+
+from budget import ResultBudget, estimate_tokens
+from paging import Paginator
+
+MAX_TOKENS = 200
+
+
+@pytest.fixture
+def result_budget():
+    return ResultBudget(Paginator(), MAX_TOKENS)
+
+
+def message(index, size=100):
+    return {"Id": str(index), "Title": f"Zpráva {index}", "Text": f"řádek {index}\n" * size}
+
+
+def read_items(result_budget, page):
+    """Items of a list result and of all its continuation pages."""
+    items = list(page["Items"])
+    while page["Continuation"]:
+        page = result_budget.next_page(page["Continuation"])
+        assert estimate_tokens(page) <= MAX_TOKENS
+        items += page["Items"]
+    return items
+
+
+def read_text(result_budget, handle):
+    text = ""
+    while handle:
+        page = result_budget.next_page(handle)
+        text, handle = text + page["Text"], page["Continuation"]
+    return text
+
+
+def test_result_within_budget_is_unchanged(result_budget):
+    value = {"Messages": [message(0, 2)]}
+    assert result_budget.fit("messages", value) is value
+
+
+def test_summary_comes_before_truncation(result_budget):
+    value = [message(index, 5) for index in range(20)]
+    result = result_budget.fit("messages", value, lambda value: [item["Title"] for item in value["Items"]])
+    assert result["Summary"] == [f"Zpráva {index}" for index in range(20)]
+    assert read_items(result_budget, result_budget.next_page(result["Continuation"])) == value
+
+
+def test_list_is_paged_within_the_budget(result_budget):
+    value = [message(index, 5) for index in range(20)]
+    result = result_budget.fit("messages", value)
+    assert estimate_tokens(result) <= MAX_TOKENS
+    assert 0 < len(result["Items"]) < 20
+    assert read_items(result_budget, result) == value
+
+
+@pytest.mark.parametrize("oversized", [0, 1])
+def test_item_larger_than_the_budget_has_its_text_cut(result_budget, oversized):
+    value = [message(index, 5) for index in range(3)]
+    value[oversized] = message(oversized, 200)
+    page = result_budget.fit("messages", value)
+    while page["Offset"] < oversized:
+        page = result_budget.next_page(page["Continuation"])
+    assert estimate_tokens(page) <= MAX_TOKENS
+    item = page["Items"][0]
+    assert item["Id"] == str(oversized)
+    assert item["Text"] + read_text(result_budget, item["Continuation"]) == value[oversized]["Text"]
+    # the next page continues with the following item
+    assert result_budget.next_page(page["Continuation"])["Items"][0]["Id"] == str(oversized + 1)
+
+
+def test_long_text_is_cut_with_a_continuation(result_budget):
+    text = "".join(f"řádek {index}\n" for index in range(500))
+    result = result_budget.fit("message", text)
+    assert estimate_tokens(result) <= MAX_TOKENS
+    head, _, note = result.partition("\n... (truncated")
+    handle = note.split("continuation ")[1].split(" ")[0]
+    assert head + "\n" + read_text(result_budget, handle) == text
+
+
+def test_reserve_keeps_room_for_the_caller(result_budget):
+    value = {"Messages": [message(index, 2) for index in range(10)]}
+    assert result_budget.fit("messages", value) is value
+    assert result_budget.fit("messages", value, reserve=MAX_TOKENS // 2) is not value
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import stat
+import types
+
+import pytest
+
+import cache
+from cache import MemoryLRUCache, SQLiteCache
+
+
+class Clock:
+    """Stands in for the time module of cache, every reading is one second later."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=clock.time, monotonic=clock.monotonic))
+    return clock
+
+
+def value(index):
+    # incompressible, so stored sizes do not depend on the codec
+    return os.urandom(600).hex() + str(index)
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    backend = SQLiteCache(str(tmp_path / "cache" / "cache.sqlite"), max_bytes=10**9)
+    yield backend
+    backend.close()
+
+
+def stored_size():
+    return len(cache.encode(value(0)))
+
+
+def test_memory_cache_evicts_least_recently_used():
+    backend = MemoryLRUCache(max_bytes=3 * stored_size())
+    for index in range(3):
+        backend.set(f"k{index}", value(index), 60)
+    assert backend.get("k0") is not None  # k1 is now the least recently used
+    backend.set("k3", value(3), 60)
+    assert [backend.get(f"k{index}") is not None for index in range(4)] == [True, False, True, True]
+    assert backend.size_bytes <= backend.max_bytes
+    assert len(backend) == 3
+
+
+def test_memory_cache_size_expiry_and_invalidation():
+    backend = MemoryLRUCache(max_bytes=10 * stored_size())
+    backend.set("a|x", value(0), 60)
+    backend.set("a|x", "small", 60)
+    assert backend.size_bytes == len(cache.encode("small"))
+    backend.set("a|y", value(1), -1)
+    assert backend.get("a|y") is None
+    backend.set("b|x", value(2), 60)
+    backend.invalidate("a|")
+    assert backend.get("a|x") is None and backend.get("b|x") is not None
+    backend.set("huge", "x" * backend.max_bytes, 60)
+    assert backend.get("huge") is None
+
+
+def test_sqlite_cache_evicts_least_recently_accessed(sqlite_cache):
+    for index in range(3):
+        sqlite_cache.set(f"k{index}", value(index), 60)
+    # room for three entries, compressed sizes differ by a few bytes
+    sqlite_cache.max_bytes = sqlite_cache.size_bytes + 100
+    assert sqlite_cache.get("k0") is not None  # recorded in memory, written with the next set
+    sqlite_cache.set("k3", value(3), 60)
+    assert [sqlite_cache.get(f"k{index}") is not None for index in range(4)] == [True, False, True, True]
+    assert sqlite_cache.size_bytes <= sqlite_cache.max_bytes
+
+
+def test_sqlite_cache_keeps_the_total_size_in_step(sqlite_cache, clock):
+    def total():
+        with sqlite3.connect(sqlite_cache.path) as db:
+            return db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    for index in range(5):
+        sqlite_cache.set(f"a|{index}", value(index), 60)
+    sqlite_cache.set("a|0", "small", 60)
+    sqlite_cache.set("b|0", value(9), 5)
+    assert sqlite_cache.size_bytes == total()
+    sqlite_cache.invalidate("a|")
+    assert sqlite_cache.size_bytes == total() > 0
+    clock.now += 60
+    sqlite_cache.set("c|0", value(0), 60)  # drops the expired b|0
+    assert sqlite_cache.size_bytes == total()
+    assert len(sqlite_cache) == 1
+    sqlite_cache.clear()
+    assert sqlite_cache.size_bytes == total() == 0
+
+
+def test_sqlite_cache_is_shared_and_private(sqlite_cache):
+    other = SQLiteCache(sqlite_cache.path)
+    try:
+        sqlite_cache.set("k", {"Marks": [1, 2]}, 60)
+        assert other.get("k") == {"Marks": [1, 2]}
+        other.invalidate("k")
+        assert sqlite_cache.get("k") is None
+    finally:
+        other.close()
+    assert stat.S_IMODE(os.stat(sqlite_cache.path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(sqlite_cache.path)).st_mode) == 0o700
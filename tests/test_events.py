@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+
+from events import EventStore, parse_bound
+
+
+def event(event_id, *times, whole_day=False, title=None):
+    """Event with (start, end) Prague local times, end None for a point event."""
+    return {
+        "Id": event_id,
+        "Title": title or event_id,
+        "EventType": {"Name": "Akce"},
+        "EventTimes": [
+            {"StartTime": f"{start}+02:00", "EndTime": f"{end}+02:00" if end else None, "WholeDay": whole_day}
+            for start, end in times
+        ],
+    }
+
+
+class Sources:
+    def __init__(self, **events):
+        self.events = events
+        self.calls = 0
+
+    def fetch(self, name):
+        def fetch():
+            self.calls += 1
+            return {"Events": list(self.events[name])}
+
+        return fetch
+
+    def store(self):
+        return EventStore({name: self.fetch(name) for name in self.events}, ttl=60)
+
+
+def ids(results):
+    return [event["Id"] for _, _, event in results]
+
+
+def test_events_of_several_sources_are_merged_once():
+    trip = event("trip", ("2026-10-20T08:00:00", "2026-10-20T12:00:00"))
+    sources = Sources(all=[trip], my=[trip, event("exam", ("2026-10-21T09:00:00", "2026-10-21T10:00:00"))], public=[])
+    store = sources.store()
+    results = store.between(datetime(2026, 10, 19), datetime(2026, 10, 26))
+    assert ids(results) == ["trip", "exam"]
+    assert results[0][2]["Sources"] == ["all", "my"]
+    # the sources are pulled once per ttl
+    store.between(datetime(2026, 10, 19), datetime(2026, 10, 26))
+    assert sources.calls == 3
+
+
+def test_overlap_is_half_open():
+    store = Sources(all=[event("trip", ("2026-10-20T08:00:00", "2026-10-20T12:00:00"))]).store()
+    assert ids(store.between(datetime(2026, 10, 20, 11, 59), datetime(2026, 10, 20, 13))) == ["trip"]
+    assert store.between(datetime(2026, 10, 20, 12), datetime(2026, 10, 20, 13)) == []
+    assert store.between(datetime(2026, 10, 20, 7), datetime(2026, 10, 20, 8)) == []
+
+
+@pytest.mark.parametrize(
+    "start, end, found",
+    [
+        (datetime(2026, 10, 20, 10), datetime(2026, 10, 20, 11), True),
+        (datetime(2026, 10, 20, 9), datetime(2026, 10, 20, 11), True),
+        (datetime(2026, 10, 20, 9), datetime(2026, 10, 20, 10), False),
+        (datetime(2026, 10, 20, 10, 1), datetime(2026, 10, 20, 11), False),
+    ],
+)
+def test_point_event(start, end, found):
+    deadline = event("deadline", ("2026-10-20T10:00:00", None))
+    store = Sources(all=[deadline, event("later", ("2026-10-20T10:00:00", "2026-10-20T12:00:00"))]).store()
+    assert ("deadline" in ids(store.between(start, end))) is found
+
+
+def test_whole_day_event_spans_its_days():
+    holidays = event("holidays", ("2026-10-29T00:00:00", "2026-10-30T00:00:00"), whole_day=True)
+    store = Sources(all=[holidays]).store()
+    [(start, end, _)] = store.between(parse_bound("2026-10-30"), parse_bound("2026-10-30", end=True))
+    assert (start, end) == (datetime(2026, 10, 29), datetime(2026, 10, 31))
+    assert store.between(parse_bound("2026-10-31"), parse_bound("2026-11-01", end=True)) == []
+
+
+def test_changed_source_rebuilds_the_index_on_refresh():
+    sources = Sources(all=[event("trip", ("2026-10-20T08:00:00", "2026-10-20T12:00:00"))])
+    store = sources.store()
+    week = (datetime(2026, 10, 19), datetime(2026, 10, 26))
+    assert ids(store.between(*week)) == ["trip"]
+    sources.events["all"] = [event("trip", ("2026-10-22T08:00:00", "2026-10-22T12:00:00"))]
+    assert store.between(*week)[0][0] == datetime(2026, 10, 20, 8)
+    store.refresh(force=True)
+    assert store.between(*week)[0][0] == datetime(2026, 10, 22, 8)
+
+
+def test_conflicts_with_lessons():
+    week = {
+        "Hours": [
+            {"Id": 1, "Caption": "1", "BeginTime": "8:00", "EndTime": "8:45"},
+            {"Id": 2, "Caption": "2", "BeginTime": "8:55", "EndTime": "9:40"},
+        ],
+        "Subjects": [{"Id": "M", "Name": "Matematika"}, {"Id": "F", "Name": "Fyzika"}],
+        "Days": [
+            {
+                "Date": "2026-10-20T00:00:00+02:00",
+                "Atoms": [{"HourId": 1, "SubjectId": "M"}, {"HourId": 2, "SubjectId": "F"}],
+            },
+        ],
+    }
+    store = Sources(
+        all=[
+            event("talk", ("2026-10-20T08:30:00", "2026-10-20T09:00:00")),
+            event("bell", ("2026-10-20T08:55:00", None)),
+            event("break", ("2026-10-20T08:45:00", "2026-10-20T08:55:00")),
+            event("evening", ("2026-10-20T18:00:00", "2026-10-20T20:00:00")),
+        ]
+    ).store()
+    conflicts = store.conflicts(datetime(2026, 10, 19), datetime(2026, 10, 26), [week])
+    assert [(conflict["Id"], [lesson["Subject"] for lesson in conflict["Lessons"]]) for conflict in conflicts] == [
+        ("talk", ["Matematika", "Fyzika"]),
+        ("bell", ["Fyzika"]),
+    ]
@@ -0,0 +1,83 @@
+from datetime import date
+
+from homeworks import HomeworkStore
+
+
+def homework(homework_id, due, subject="Matematika", abbrev="M", **extra):
+    return {
+        "ID": homework_id,
+        "DateEnd": f"{due}T00:00:00+02:00",
+        "Subject": {"Name": subject, "Abbrev": abbrev},
+        "Content": f"Úkol {homework_id}",
+        "Done": False,
+        "Closed": False,
+        **extra,
+    }
+
+
+class Upstream:
+    def __init__(self):
+        self.homeworks = [
+            homework("a", "2026-10-16"),
+            homework("b", "2026-10-17", Done=True),
+            homework("c", "2026-10-20", "Fyzika", "F"),
+            homework("d", "2026-10-22"),
+            homework("e", "2026-10-23", "Fyzika", "F"),
+        ]
+        self.count = {"Count": 3}
+        self.fetches = 0
+        self.invalidations = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return {"Homeworks": list(self.homeworks)}
+
+    def fetch_count(self):
+        return self.count
+
+    def invalidate(self):
+        self.invalidations += 1
+
+    def store(self, ttl=15 * 60):
+        return HomeworkStore(self.fetch, self.fetch_count, self.invalidate, ttl)
+
+
+def ids(homeworks):
+    return [homework["Id"] for homework in homeworks]
+
+
+def test_due_between_is_inclusive_and_filters_by_subject():
+    store = Upstream().store()
+    assert ids(store.due_between(date(2026, 10, 20), date(2026, 10, 22))) == ["c", "d"]
+    assert ids(store.due_between(date(2026, 10, 19), date(2026, 10, 25), "fyzika")) == ["c", "e"]
+    assert ids(store.due_between(date(2026, 10, 19), date(2026, 10, 25), "F")) == ["c", "e"]
+
+
+def test_overdue_skips_done_and_closed():
+    upstream = Upstream()
+    upstream.homeworks.append(homework("f", "2026-10-18", Closed=True))
+    assert ids(upstream.store().overdue(date(2026, 10, 20))) == ["a"]
+
+
+def test_list_is_refetched_only_when_the_count_changes():
+    upstream = Upstream()
+    store = upstream.store()
+    store.overdue(date(2026, 10, 20))
+    store.due_between(date(2026, 10, 19), date(2026, 10, 25))
+    assert (upstream.fetches, upstream.invalidations) == (1, 0)
+    # the same count served from a snapshot is no change
+    upstream.count = {"Count": 3, "Stale": {"AgeSeconds": 60, "Reason": "HTTP 503"}}
+    store.overdue(date(2026, 10, 20))
+    assert upstream.fetches == 1
+    upstream.count = {"Count": 4}
+    upstream.homeworks.append(homework("g", "2026-10-21"))
+    assert ids(store.due_between(date(2026, 10, 21), date(2026, 10, 21))) == ["g"]
+    assert (upstream.fetches, upstream.invalidations) == (2, 1)
+
+
+def test_list_is_refetched_after_the_ttl():
+    upstream = Upstream()
+    store = upstream.store(ttl=0)
+    store.overdue(date(2026, 10, 20))
+    store.overdue(date(2026, 10, 20))
+    assert upstream.fetches == 2
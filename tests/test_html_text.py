@@ -0,0 +1,69 @@
+import pytest
+
+from html_text import MessageTextCache, html_to_text
+
+MESSAGE = (
+    "<p>Dobr&yacute; den,</p>"
+    "<p>zítra <b>nebude</b>&nbsp;výuka &amp; oběd. Viz <a href=\"https://skola.cz/?a=1&amp;b=2\">web</a>.</p>"
+    "<!-- poznámka <b>skrytá</b> -->"
+    "<ul><li>první</li><li>druhá<ol><li>a</li><li>b</li></ol></li></ul>"
+    "<script>alert('x')</script>"
+    "Děkuji<br>Učitel"
+)
+
+
+def test_paragraphs_entities_and_links():
+    assert html_to_text(MESSAGE) == (
+        "Dobrý den,\n"
+        "\n"
+        "zítra nebude výuka & oběd. Viz web (https://skola.cz/?a=1&b=2).\n"
+        "\n"
+        "- první\n"
+        "- druhá\n"
+        "  1. a\n"
+        "  2. b\n"
+        "Děkuji\n"
+        "Učitel"
+    )
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 13, 64])
+def test_chunk_splits_match_whole_document(size):
+    chunks = [MESSAGE[start : start + size] for start in range(0, len(MESSAGE), size)]
+    assert html_to_text(chunks) == html_to_text(MESSAGE)
+
+
+def test_entity_split_across_chunks():
+    # &nbsp; collapses with the surrounding white space
+    assert html_to_text(["a &am", "p; b &nb", "sp;c &lt", ";d"]) == "a & b c <d"
+
+
+def test_nested_lists_are_indented_and_numbered_per_list():
+    text = html_to_text("<ol><li>one<ul><li>x</li><li>y</li></ul></li><li>two</li></ol>")
+    assert text == "1. one\n  - x\n  - y\n2. two"
+
+
+@pytest.mark.parametrize(
+    "html, text",
+    [
+        ('<a href="https://a.cz">https://a.cz</a>', "https://a.cz"),
+        ("<a href='#top'>nahoru</a>", "nahoru"),
+        ('<a href="javascript:void(0)">klik</a>', "klik"),
+        ("<a href=https://b.cz>b</a>", "b (https://b.cz)"),
+        ("<a>bez odkazu</a>", "bez odkazu"),
+    ],
+)
+def test_links(html, text):
+    assert html_to_text(html) == text
+
+
+def test_unterminated_tag_at_the_end_is_text():
+    assert html_to_text("a < b") == "a < b"
+
+
+def test_message_cache_converts_again_when_edited():
+    cache = MessageTextCache(max_entries=1)
+    message = {"Id": "1", "Text": "<p>old</p>"}
+    assert cache.convert(message)["Text"] == "old"
+    assert cache.convert({**message, "Text": "<p>new</p>"})["Text"] == "new"
+    assert cache.convert({"Id": "2", "Text": None}) == {"Id": "2", "Text": None}
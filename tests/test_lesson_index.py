@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from timetable import LessonIndex
+
+HOURS = [
+    {"Id": 1, "Caption": "1", "BeginTime": "8:00", "EndTime": "8:45"},
+    {"Id": 2, "Caption": "2", "BeginTime": "8:55", "EndTime": "9:40"},
+    {"Id": 3, "Caption": "3", "BeginTime": "10:00", "EndTime": "10:45"},
+    {"Id": 4, "Caption": "4", "BeginTime": "10:55", "EndTime": "11:40"},
+]
+SUBJECTS = [{"Id": "M", "Name": "Matematika"}, {"Id": "F", "Name": "Fyzika"}, {"Id": "CJ", "Name": "Český jazyk"}]
+
+
+def week(tuesday=("M", None, "F")):
+    """Week of Monday 2026-10-19, subjects per hour of Tuesday, None for a free hour."""
+    return {
+        "Hours": HOURS,
+        "Subjects": SUBJECTS,
+        "Days": [
+            {"Date": "2026-10-19T00:00:00+02:00", "Atoms": [{"HourId": 1, "SubjectId": "CJ"}]},
+            {
+                "Date": "2026-10-20T00:00:00+02:00",
+                "Atoms": [
+                    {"HourId": hour, "SubjectId": subject}
+                    for hour, subject in enumerate(tuesday, start=1)
+                    if subject is not None
+                ],
+            },
+            {"Date": "2026-10-21T00:00:00+02:00", "Atoms": []},
+        ],
+    }
+
+
+class Upstream:
+    def __init__(self):
+        self.week = week()
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        return self.week
+
+
+def subject(lesson):
+    return lesson and (lesson["Date"], lesson["Subject"], lesson["Begin"])
+
+
+def test_now_during_lessons_and_breaks():
+    index = LessonIndex(Upstream().fetch)
+    assert subject(index.now(datetime(2026, 10, 20, 8, 0))) == ("2026-10-20", "Matematika", "8:00")
+    assert subject(index.now(datetime(2026, 10, 20, 8, 44))) == ("2026-10-20", "Matematika", "8:00")
+    assert index.now(datetime(2026, 10, 20, 8, 45)) is None
+    assert index.now(datetime(2026, 10, 20, 7, 59)) is None
+    assert index.now(datetime(2026, 10, 21, 8, 30)) is None
+
+
+def test_next_lesson_later_today_or_on_a_following_day():
+    index = LessonIndex(Upstream().fetch)
+    assert subject(index.next(datetime(2026, 10, 20, 8, 0))) == ("2026-10-20", "Fyzika", "10:00")
+    assert subject(index.next(datetime(2026, 10, 19, 12, 0))) == ("2026-10-20", "Matematika", "8:00")
+    assert index.next(datetime(2026, 10, 20, 11, 0)) is None
+
+
+def test_free_periods_between_the_first_and_last_lesson():
+    index = LessonIndex(Upstream().fetch)
+    assert index.free_periods("2026-10-20") == [{"Hour": "2", "Begin": "8:55", "End": "9:40"}]
+    assert index.free_periods("2026-10-21") == []
+
+
+def test_week_is_fetched_once_per_ttl_and_fed_by_update():
+    upstream = Upstream()
+    index = LessonIndex(upstream.fetch, ttl=300)
+    index.now(datetime(2026, 10, 20, 8, 0))
+    index.next(datetime(2026, 10, 20, 8, 0))
+    assert upstream.calls == 1
+    index.update(week(tuesday=("F", "M", "F")))
+    assert subject(index.now(datetime(2026, 10, 20, 9, 0))) == ("2026-10-20", "Matematika", "8:55")
+    assert index.free_periods("2026-10-20") == []
+    assert upstream.calls == 1
@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+
+from marks import MarkHistory, mark_value, parse_period, period_label, period_of, summarize_marks
+
+
+def mark(mark_id, day, text, weight=1, **extra):
+    return {"Id": mark_id, "MarkDate": f"{day}T00:00:00+02:00", "MarkText": text, "Weight": weight, **extra}
+
+
+def response(*subjects):
+    """get_marks response from (subject id, name, marks) tuples."""
+    return {"Subjects": [{"Subject": {"Id": sid, "Name": name}, "Marks": list(marks)} for sid, name, marks in subjects]}
+
+
+MATH = [
+    mark("m1", "2026-09-10", "4", 2),
+    mark("m2", "2026-09-25", "3"),
+    mark("m3", "2026-10-05", "2-"),
+    mark("m4", "2026-10-15", "1", 2, IsNew=True),
+    mark("m5", "2026-10-16", "N"),
+]
+PHYSICS = [mark("f1", "2026-10-01", "2"), mark("f2", "2026-10-08", "2")]
+
+
+def history(path=None, final=None):
+    marks = response(("M", "Matematika", MATH), ("F", "Fyzika", PHYSICS))
+    return MarkHistory(lambda: marks, (lambda: final) if final else None, path)
+
+
+@pytest.mark.parametrize("text, value", [("1", 1.0), (" 2- ", 2.5), ("5", 5.0), ("N", None), ("6", None), (None, None)])
+def test_mark_value(text, value):
+    assert mark_value(text) == value
+
+
+def test_periods_are_half_years_of_the_school_year():
+    assert period_label(period_of(date(2026, 9, 1))) == "2026/27-1"
+    assert period_label(period_of(date(2027, 1, 31))) == "2026/27-1"
+    assert period_label(period_of(date(2027, 2, 1))) == "2026/27-2"
+    assert period_label(period_of(date(2026, 6, 30))) == "2025/26-2"
+    assert parse_period("2026/27-2") == period_of(date(2027, 3, 1))
+
+
+def test_summary_per_subject():
+    [math, _] = summarize_marks(response(("M", "Matematika", MATH), ("F", "Fyzika", PHYSICS)))["Subjects"]
+    assert math["Count"] == 5
+    assert math["WeightedAverage"] == round((4 * 2 + 3 + 2.5 + 1 * 2) / 6, 2)
+    assert (math["Best"], math["Worst"], math["LastMarkDate"], math["New"]) == (1.0, 4.0, "2026-10-16", 1)
+
+
+def test_trend_of_an_improving_subject():
+    [math] = history().trend("mat")
+    assert (math["Subject"], math["Count"], math["From"], math["To"]) == ("Matematika", 4, "2026-09-10", "2026-10-15")
+    assert math["WeightedAverage"] == round((4 * 2 + 3 + 2.5 + 1 * 2) / 6, 2)
+    assert (math["FirstHalfAverage"], math["SecondHalfAverage"]) == (round(11 / 3, 2), 1.5)
+    assert math["SlopePer30Days"] < 0 and math["Trend"] == "improving"
+    [physics] = history().trend("F", since=date(2026, 10, 1), until=date(2026, 10, 7))
+    assert (physics["Count"], physics["SlopePer30Days"], physics["Trend"]) == (1, None, None)
+
+
+def test_moving_average_is_weighted_over_the_window():
+    [math] = history().moving_average("Matematika", window=2)
+    assert [point["MovingAverage"] for point in math["Points"]] == [4.0, round(11 / 3, 2), 2.75, round(4.5 / 3, 2)]
+
+
+def test_sync_updates_edited_marks_and_keeps_removed_ones():
+    store = history()
+    store.refresh()
+    assert not store.sync(response(("M", "Matematika", MATH), ("F", "Fyzika", PHYSICS)))
+    edited = response(("M", "Matematika", [mark("m1", "2026-09-10", "5", 2)]))
+    assert store.sync(edited)
+    [math] = store.trend("M", until=date(2026, 9, 10))
+    assert math["WeightedAverage"] == 5.0
+    assert store.trend("M")[0]["Count"] == 4
+
+
+def test_history_survives_a_restart(tmp_path):
+    path = str(tmp_path / "marks.bin")
+    store = history(path)
+    trend = store.trend()
+    assert MarkHistory(lambda: {}, path=path, ttl=3600).trend() == trend
+
+
+def test_compare_periods_with_final_marks():
+    final = {
+        "CertificateTerms": [
+            {
+                "Subjects": [{"Id": "M", "Name": "Matematika"}],
+                "FinalMarks": [{"SubjectId": "M", "MarkDate": "2026-06-26T00:00:00+02:00", "MarkText": "3"}],
+            }
+        ]
+    }
+    marks = response(("M", "Matematika", [mark("old", "2026-03-10", "3"), *MATH]))
+    store = MarkHistory(lambda: marks, lambda: final)
+    [math] = store.compare_periods(parse_period("2025/26-2"), parse_period("2026/27-1"), "M")
+    assert math["First"] == {"Period": "2025/26-2", "Count": 1, "WeightedAverage": 3.0, "FinalMark": 3.0}
+    assert math["Second"]["Count"] == 4
+    assert math["Change"] == round(math["Second"]["WeightedAverage"] - 3.0, 2)
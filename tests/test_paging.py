@@ -0,0 +1,87 @@
+import pytest
+
+from cache import MemoryLRUCache
+from paging import Paginator
+
+
+class Upstream:
+    def __init__(self, count):
+        self.items = [{"Id": str(index)} for index in range(count)]
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        return {"Homeworks": list(self.items)}
+
+
+def walk(paginator, upstream, page_size):
+    pages = [paginator.page("homeworks", upstream.fetch, "Homeworks", None, page_size)]
+    while pages[-1]["NextCursor"]:
+        pages.append(paginator.page("homeworks", upstream.fetch, "Homeworks", pages[-1]["NextCursor"], page_size))
+    return pages
+
+
+def test_cursors_walk_the_whole_list_with_one_fetch():
+    upstream = Upstream(7)
+    pages = walk(Paginator(), upstream, 3)
+    assert [len(page["Homeworks"]) for page in pages] == [3, 3, 1]
+    assert [item for page in pages for item in page["Homeworks"]] == upstream.items
+    assert {page["Total"] for page in pages} == {7}
+    assert len({page["SnapshotId"] for page in pages}) == 1
+    assert upstream.calls == 1
+
+
+def test_pages_come_from_the_snapshot_of_the_first_page():
+    paginator = Paginator()
+    upstream = Upstream(4)
+    first = paginator.page("homeworks", upstream.fetch, "Homeworks", None, 2)
+    upstream.items.insert(0, {"Id": "new"})
+    second = paginator.page("homeworks", upstream.fetch, "Homeworks", first["NextCursor"], 2)
+    assert second["Homeworks"] == [{"Id": "2"}, {"Id": "3"}]
+    assert second["NextCursor"] is None
+    # a new walk sees the changed list under a new snapshot id
+    assert paginator.page("homeworks", upstream.fetch, "Homeworks", None, 2)["SnapshotId"] != first["SnapshotId"]
+
+
+def test_unchanged_list_keeps_its_snapshot_id():
+    paginator = Paginator()
+    upstream = Upstream(5)
+    first = paginator.page("homeworks", upstream.fetch, "Homeworks")
+    assert paginator.page("homeworks", upstream.fetch, "Homeworks")["SnapshotId"] == first["SnapshotId"]
+
+
+def test_empty_list_and_page_size_below_one():
+    paginator = Paginator()
+    assert paginator.page("homeworks", lambda: {}, "Homeworks") == {
+        "Homeworks": [],
+        "SnapshotId": paginator.snapshot("homeworks", []),
+        "Total": 0,
+        "NextCursor": None,
+    }
+    page = paginator.page("homeworks", Upstream(3).fetch, "Homeworks", None, 0)
+    assert len(page["Homeworks"]) == 1
+    assert page["NextCursor"].endswith(":1")
+
+
+def test_expired_or_foreign_cursor_is_rejected():
+    cache = MemoryLRUCache()
+    paginator = Paginator(cache, ttl=60)
+    upstream = Upstream(5)
+    cursor = paginator.page("homeworks", upstream.fetch, "Homeworks", None, 2)["NextCursor"]
+    # another account sharing the cache does not see the snapshot
+    with pytest.raises(ValueError):
+        Paginator(cache, namespace="other|").page("homeworks", upstream.fetch, "Homeworks", cursor, 2)
+    cache.clear()
+    with pytest.raises(ValueError):
+        paginator.page("homeworks", upstream.fetch, "Homeworks", cursor, 2)
+    assert upstream.calls == 1
+
+
+def test_stale_metadata_is_repeated_on_every_page():
+    stale = {"AgeSeconds": 10, "SavedAt": "2026-10-19T08:00:00+0200", "Reason": "HTTP 503"}
+    upstream = Upstream(3)
+    paginator = Paginator()
+    first = paginator.page("homeworks", lambda: {**upstream.fetch(), "Stale": stale}, "Homeworks", None, 2)
+    second = paginator.page("homeworks", upstream.fetch, "Homeworks", first["NextCursor"], 2)
+    assert first["Stale"] == second["Stale"] == stale
+    assert "Stale" not in paginator.page("homeworks", upstream.fetch, "Homeworks", None, 2)
@@ -0,0 +1,84 @@
+import httpx
+import pytest
+
+from client import Client
+from snapshots import SnapshotStore
+
+ABSENCE = {"PercentageThreshold": 0.25, "Absences": [{"Day": "2026-10-19T00:00:00+02:00", "Missed": 2}]}
+
+
+class Upstream:
+    """School server behind an httpx.MockTransport, answering with status unless it is 200."""
+
+    def __init__(self):
+        self.status = 200
+        self.paths = []
+
+    def handle(self, request):
+        self.paths.append(request.url.path)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        if request.url.path == "/api/login":
+            return httpx.Response(200, json={"access_token": "access", "refresh_token": "refresh"})
+        return httpx.Response(200, json=ABSENCE)
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+@pytest.fixture
+def make_client(tmp_path, upstream):
+    clients = []
+
+    def make(**kwargs):
+        client = Client("pwd", "user", "https://school.test", snapshots=SnapshotStore(str(tmp_path)), **kwargs)
+        client.http.close()
+        client.http = httpx.Client(transport=httpx.MockTransport(upstream.handle))
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_failed_login_of_a_fresh_client_serves_the_snapshot(make_client, upstream):
+    assert make_client().get_absence_student() == ABSENCE
+    upstream.status = 503
+    # e.g. a restarted server, logged out but with the snapshots of the last run
+    client = make_client()
+    stale = client.get_absence_student()
+    assert stale["Absences"] == ABSENCE["Absences"]
+    assert stale["Stale"]["Reason"] == "HTTP 503"
+    assert client.access_token is None and client.login_error == "HTTP 503"
+
+
+def test_failed_login_without_a_snapshot_raises(make_client, upstream):
+    upstream.status = 503
+    with pytest.raises(httpx.HTTPStatusError):
+        make_client().get_absence_student()
+
+
+def test_client_errors_are_not_served_from_the_snapshot(make_client, upstream):
+    client = make_client()
+    client.get_absence_student()
+    upstream.status = 404
+    with pytest.raises(httpx.HTTPStatusError):
+        client.get_absence_student()
+
+
+def test_consecutive_failures_skip_the_server_until_it_recovers(make_client, upstream):
+    client = make_client(degraded_after=2, degraded_cooldown=60)
+    client.get_absence_student()
+    upstream.status = 500
+    for _ in range(2):
+        assert client.get_absence_student()["Stale"]["Reason"] == "HTTP 500"
+    requests = len(upstream.paths)
+    assert client.get_absence_student()["Stale"]["Reason"] == "upstream degraded: HTTP 500"
+    assert len(upstream.paths) == requests
+    upstream.status = 200
+    client.degraded_until = 0.0  # cooldown over
+    assert client.get_absence_student() == ABSENCE
+    assert client.failures == 0
@@ -0,0 +1,124 @@
+from timetable import diff_timetables
+
+NAMES = {
+    "Hours": [{"Id": hour, "Caption": str(hour - 1)} for hour in range(2, 8)],
+    "Subjects": [
+        {"Id": "M", "Name": "Matematika"},
+        {"Id": "CJ", "Name": "Český jazyk"},
+        {"Id": "F", "Name": "Fyzika"},
+    ],
+    "Teachers": [{"Id": "T1", "Name": "Novák"}, {"Id": "T2", "Name": "Svobodová"}],
+    "Rooms": [{"Id": "R1", "Abbrev": "101"}, {"Id": "R2", "Abbrev": "202"}],
+}
+
+
+def atom(hour, subject="M", teacher="T1", room="R1", **extra):
+    return {"HourId": hour, "SubjectId": subject, "TeacherId": teacher, "RoomId": room, **extra}
+
+
+def week(days, cycles=("ODD",)):
+    return {**NAMES, "Cycles": [{"Id": cycle} for cycle in cycles], "Days": days}
+
+
+def day(day_of_week, atoms, day_type="WorkDay"):
+    # the week of Monday 2026-10-19
+    return {
+        "DayOfWeek": day_of_week,
+        "Date": f"2026-10-{18 + day_of_week:02d}T00:00:00+02:00",
+        "DayType": day_type,
+        "Atoms": atoms,
+    }
+
+
+PERMANENT = week(
+    [
+        day(1, [atom(2), atom(3, "CJ"), atom(4, "F")]),
+        day(2, [atom(2, CycleIds=["ODD"]), atom(2, "F", CycleIds=["EVEN"])]),
+    ]
+)
+
+
+def changes(actual):
+    return diff_timetables(PERMANENT, actual)["Changes"]
+
+
+def kinds(result):
+    return [(change["Day"], change["Hour"], change["Type"]) for change in result]
+
+
+def test_unchanged_week_has_no_changes():
+    actual = week([day(1, [atom(2), atom(3, "CJ"), atom(4, "F")]), day(2, [atom(2)])])
+    assert changes(actual) == []
+
+
+def test_cancelled_by_change_type_missing_subject_or_missing_atom():
+    actual = week(
+        [
+            day(1, [atom(2, Change={"ChangeType": "Canceled", "Description": "Odpadá"}), atom(3, None)]),
+            day(2, [atom(2)]),
+        ]
+    )
+    result = changes(actual)
+    assert kinds(result) == [
+        ("Monday", "1", "cancelled"),
+        ("Monday", "2", "cancelled"),
+        ("Monday", "3", "cancelled"),
+    ]
+    assert result[0]["Subject"] == "Matematika"
+    assert result[0]["Description"] == "Odpadá"
+    assert result[2]["Subject"] == "Fyzika"
+
+
+def test_added_lesson():
+    actual = week([day(1, [atom(2), atom(3, "CJ"), atom(4, "F"), atom(5, "F", "T2")]), day(2, [atom(2)])])
+    [change] = changes(actual)
+    assert (change["Hour"], change["Type"], change["Subject"], change["To"]) == ("4", "added", "Fyzika", "Svobodová")
+
+
+def test_room_teacher_and_subject_changes():
+    actual = week(
+        [
+            day(1, [atom(2, room="R2"), atom(3, "CJ", "T2"), atom(4, "M")]),
+            day(2, [atom(2, teacher="T2", room="R2")]),
+        ]
+    )
+    result = changes(actual)
+    assert [(c["Day"], c["Hour"], c["Type"], c["From"], c["To"]) for c in result] == [
+        ("Monday", "1", "room_changed", "101", "202"),
+        ("Monday", "2", "teacher_changed", "Novák", "Svobodová"),
+        ("Monday", "3", "subject_changed", "Fyzika", "Matematika"),
+        ("Tuesday", "1", "teacher_changed", "Novák", "Svobodová"),
+        ("Tuesday", "1", "room_changed", "101", "202"),
+    ]
+
+
+def test_cycle_filtering_keeps_only_atoms_of_the_week_cycle():
+    odd = week([day(1, [atom(2), atom(3, "CJ"), atom(4, "F")]), day(2, [atom(2)])], cycles=("ODD",))
+    assert changes(odd) == []
+    even = week([day(1, [atom(2), atom(3, "CJ"), atom(4, "F")]), day(2, [atom(2, "F")])], cycles=("EVEN",))
+    assert changes(even) == []
+    # the even week's lesson in an odd week is a subject change, not an extra lesson
+    assert kinds(changes(week(even["Days"], cycles=("ODD",)))) == [("Tuesday", "1", "subject_changed")]
+
+
+def test_free_day_cancels_all_planned_lessons():
+    actual = week([day(1, [], day_type="Holiday"), day(2, [atom(2)])])
+    assert kinds(changes(actual)) == [
+        ("Monday", "1", "cancelled"),
+        ("Monday", "2", "cancelled"),
+        ("Monday", "3", "cancelled"),
+    ]
+
+
+def test_changes_are_cross_checked_with_substitutions():
+    actual = week([day(1, [atom(2), atom(3, None), atom(4, None)]), day(2, [atom(2)])])
+    substitutions = {
+        "Changes": [
+            {"Day": "2026-10-19T00:00:00+02:00", "Hours": "2-3", "Description": "Odpadá"},
+            {"Day": "2026-10-20T00:00:00+02:00", "Hours": "5", "Description": "Jiná třída"},
+            {"Day": "2026-11-02T00:00:00+01:00", "Hours": "1", "Description": "Jiný týden"},
+        ]
+    }
+    result = diff_timetables(PERMANENT, actual, substitutions)
+    assert [change["InSubstitutions"] for change in result["Changes"]] == [True, True]
+    assert [change["Description"] for change in result["UnmatchedSubstitutions"]] == ["Jiná třída"]
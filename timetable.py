@@ -0,0 +1,380 @@
+from datetime import datetime
+from typing import Callable
+import bisect
+import time
+
+from stores import RefreshingStore
+
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+CANCELLED_CHANGE_TYPES = {"Canceled", "Cancelled", "Removed"}
+
+
+def _names(*timetables: dict) -> dict[str, dict[str, str]]:
+    """
+    Merges the id -> name lookups of the given timetables.
+    """
+    names: dict[str, dict[str, str]] = {"Subjects": {}, "Teachers": {}, "Rooms": {}, "Hours": {}}
+    for timetable in timetables:
+        for subject in timetable.get("Subjects") or []:
+            names["Subjects"][subject["Id"]] = subject.get("Name") or subject.get("Abbrev", "")
+        for teacher in timetable.get("Teachers") or []:
+            names["Teachers"][teacher["Id"]] = teacher.get("Name") or teacher.get("Abbrev", "")
+        for room in timetable.get("Rooms") or []:
+            names["Rooms"][room["Id"]] = room.get("Abbrev") or room.get("Name", "")
+        for hour in timetable.get("Hours") or []:
+            names["Hours"][hour["Id"]] = hour.get("Caption", "")
+    return names
+
+
+def index_atoms(timetable: dict, cycle_ids: set[str] | None = None) -> dict[tuple[int, int], list[dict]]:
+    """
+    Indexes timetable atoms by (DayOfWeek, HourId).
+    Args:
+        timetable (dict): Permanent or actual timetable.
+        cycle_ids (set[str], optional): Keep only atoms valid in these cycles
+            (odd/even weeks). Atoms without CycleIds are always kept.
+    Returns:
+        dict: {(day_of_week, hour_id): [atom, ...]}
+    """
+    index: dict[tuple[int, int], list[dict]] = {}
+    for day in timetable.get("Days") or []:
+        for atom in day.get("Atoms") or []:
+            atom_cycles = atom.get("CycleIds") or []
+            if cycle_ids and atom_cycles and not cycle_ids.intersection(atom_cycles):
+                continue
+            index.setdefault((day["DayOfWeek"], atom["HourId"]), []).append(atom)
+    return index
+
+
+def _is_cancelled(atom: dict) -> bool:
+    change = atom.get("Change") or {}
+    return change.get("ChangeType") in CANCELLED_CHANGE_TYPES or atom.get("SubjectId") is None
+
+
+def _pair(permanent: list[dict], actual: list[dict]) -> tuple[list[tuple[dict, dict]], list[dict], list[dict]]:
+    """
+    Pairs the atoms of one (day, hour) slot, first by group, then by subject.
+    Returns:
+        Tuple of (pairs, unmatched permanent atoms, unmatched actual atoms)
+    """
+    if len(permanent) == 1 and len(actual) == 1:
+        return [(permanent[0], actual[0])], [], []
+    pairs = []
+    remaining = list(actual)
+    unmatched = []
+    for key in ("GroupIds", "SubjectId"):
+        unmatched = []
+        for atom in permanent:
+            wanted = atom.get(key)
+            wanted = frozenset(wanted or []) if key == "GroupIds" else wanted
+            for candidate in remaining:
+                found = candidate.get(key)
+                found = frozenset(found or []) if key == "GroupIds" else found
+                if found == wanted:
+                    pairs.append((atom, candidate))
+                    remaining.remove(candidate)
+                    break
+            else:
+                unmatched.append(atom)
+        permanent = unmatched
+    return pairs, unmatched, remaining
+
+
+def _substitution_slots(substitutions: dict | None) -> dict[tuple[str, str], dict]:
+    """
+    Indexes substitution changes by (date, hour caption).
+    Hours can be a single caption ("3"), a range ("3-4") or a list ("3,4").
+    """
+    slots: dict[tuple[str, str], dict] = {}
+    for change in (substitutions or {}).get("Changes") or []:
+        day = (change.get("Day") or "")[:10]
+        hours = str(change.get("Hours") or "").replace(" ", "")
+        captions: list[str] = []
+        for part in hours.split(","):
+            if "-" in part:
+                start, _, end = part.partition("-")
+                if start.isdigit() and end.isdigit():
+                    captions.extend(str(h) for h in range(int(start), int(end) + 1))
+                    continue
+            if part:
+                captions.append(part)
+        for caption in captions or [""]:
+            slots[(day, caption)] = change
+    return slots
+
+
+def diff_timetables(permanent: dict, actual: dict, substitutions: dict | None = None) -> dict:
+    """
+    Computes what is different in the actual week compared to the permanent timetable.
+    Both timetables are indexed by (day, hour) once, so the diff is linear in the
+    number of lessons. Every change is cross-checked with the substitutions endpoint.
+    Args:
+        permanent (dict): Result of Client.get_permanent_timetable.
+        actual (dict): Result of Client.get_actual_timetable.
+        substitutions (dict, optional): Result of Client.get_substitutions.
+    Returns:
+        dict: {
+            "Changes": [
+                {
+                    "Date": str,
+                    "Day": str,
+                    "Hour": str,
+                    "Type": "cancelled" | "added" | "subject_changed" | "teacher_changed" | "room_changed",
+                    "Subject": str,
+                    "From": str | None,
+                    "To": str | None,
+                    "Description": str,
+                    "InSubstitutions": bool
+                },
+                ...
+            ],
+            "UnmatchedSubstitutions": [ {...} ]
+        }
+    """
+    names = _names(permanent, actual)
+    week_cycles = {cycle["Id"] for cycle in actual.get("Cycles") or []}
+    permanent_index = index_atoms(permanent, week_cycles)
+    actual_index = index_atoms(actual)
+    slots = _substitution_slots(substitutions)
+    matched_slots: set[tuple[str, str]] = set()
+    changes: list[dict] = []
+
+    def add(
+        day: dict,
+        hour_id: int,
+        kind: str,
+        atom: dict,
+        before: str | None,
+        after: str | None,
+        changed: dict | None = None,
+    ) -> None:
+        date = (day.get("Date") or "")[:10]
+        hour = names["Hours"].get(hour_id, str(hour_id))
+        change = (changed or atom).get("Change") or {}
+        slot = (date, hour)
+        in_substitutions = slot in slots
+        if in_substitutions:
+            matched_slots.add(slot)
+        changes.append(
+            {
+                "Date": date,
+                "Day": DAYS_OF_WEEK[day["DayOfWeek"] - 1],
+                "Hour": hour,
+                "Type": kind,
+                "Subject": names["Subjects"].get(atom.get("SubjectId"), ""),
+                "From": before,
+                "To": after,
+                "Description": change.get("Description") or day.get("DayDescription") or "",
+                "InSubstitutions": in_substitutions,
+            }
+        )
+
+    hours_by_day: dict[int, set[int]] = {}
+    for day_of_week, hour_id in [*permanent_index, *actual_index]:
+        hours_by_day.setdefault(day_of_week, set()).add(hour_id)
+
+    for day in actual.get("Days") or []:
+        day_of_week = day["DayOfWeek"]
+        hour_ids = hours_by_day.get(day_of_week, set())
+        free_day = day.get("DayType", "WorkDay") != "WorkDay"
+        for hour_id in sorted(hour_ids):
+            planned = permanent_index.get((day_of_week, hour_id), [])
+            if free_day:
+                for atom in planned:
+                    add(day, hour_id, "cancelled", atom, None, None)
+                continue
+            pairs, removed, added = _pair(planned, actual_index.get((day_of_week, hour_id), []))
+            for atom in removed:
+                add(day, hour_id, "cancelled", atom, None, None)
+            for atom in added:
+                if not _is_cancelled(atom):
+                    add(day, hour_id, "added", atom, None, names["Teachers"].get(atom.get("TeacherId")))
+            for before, after in pairs:
+                if _is_cancelled(after):
+                    add(day, hour_id, "cancelled", before, None, None, changed=after)
+                    continue
+                if before.get("SubjectId") != after.get("SubjectId"):
+                    add(
+                        day,
+                        hour_id,
+                        "subject_changed",
+                        after,
+                        names["Subjects"].get(before.get("SubjectId")),
+                        names["Subjects"].get(after.get("SubjectId")),
+                    )
+                elif before.get("TeacherId") != after.get("TeacherId"):
+                    add(
+                        day,
+                        hour_id,
+                        "teacher_changed",
+                        after,
+                        names["Teachers"].get(before.get("TeacherId")),
+                        names["Teachers"].get(after.get("TeacherId")),
+                    )
+                if before.get("RoomId") != after.get("RoomId"):
+                    add(
+                        day,
+                        hour_id,
+                        "room_changed",
+                        after,
+                        names["Rooms"].get(before.get("RoomId")),
+                        names["Rooms"].get(after.get("RoomId")),
+                    )
+
+    week_dates = {(day.get("Date") or "")[:10] for day in actual.get("Days") or []}
+    unmatched = [
+        change for slot, change in slots.items() if slot not in matched_slots and slot[0] in week_dates
+    ]
+    # one substitution can cover several hours, report it once
+    unique_unmatched = list({id(change): change for change in unmatched}.values())
+    return {"Changes": changes, "UnmatchedSubstitutions": unique_unmatched}
+
+
+
+def _minutes(value: str) -> int:
+    hours, _, minutes = value.partition(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def lessons_by_day(week: dict) -> tuple[dict[str, list[dict]], list[tuple[int, int, str]]]:
+    """
+    Extracts the lessons which take place from an actual timetable.
+    Returns:
+        Tuple of ({date: [lesson, ...] sorted by Begin}, [(begin, end, caption), ...] of all hours),
+        times are minutes after midnight.
+    """
+    names = _names(week)
+    hours = {}
+    for hour in week.get("Hours") or []:
+        if hour.get("BeginTime") and hour.get("EndTime"):
+            hours[hour["Id"]] = (_minutes(hour["BeginTime"]), _minutes(hour["EndTime"]), hour.get("Caption", ""))
+    days: dict[str, list[dict]] = {}
+    for day in week.get("Days") or []:
+        lessons = []
+        for atom in day.get("Atoms") or []:
+            if atom.get("HourId") not in hours or _is_cancelled(atom):
+                continue
+            begin, end, caption = hours[atom["HourId"]]
+            change = atom.get("Change") or {}
+            lessons.append(
+                {
+                    "Begin": begin,
+                    "End": end,
+                    "Hour": caption,
+                    "Subject": names["Subjects"].get(atom.get("SubjectId"), ""),
+                    "Teacher": names["Teachers"].get(atom.get("TeacherId"), ""),
+                    "Room": names["Rooms"].get(atom.get("RoomId"), ""),
+                    "Change": change.get("Description") or None,
+                }
+            )
+        lessons.sort(key=lambda lesson: lesson["Begin"])
+        days[(day.get("Date") or "")[:10]] = lessons
+    return days, list(hours.values())
+
+
+class LessonIndex(RefreshingStore):
+    """
+    Sorted per-day interval index over the actual week's lessons.
+
+    The week is fetched at most once per ttl seconds and the index is rebuilt
+    only when the fetched week differs from the indexed one, so now/next/free
+    queries are a dictionary lookup plus a bisect. A rebuilt index replaces
+    the (days, starts, hours) tuple at once, so queries reading it without
+    the lock never see parts of two different weeks.
+    """
+
+    def __init__(self, fetch: Callable[[], dict], ttl: float = 300):
+        """
+        Args:
+            fetch (Callable): Returns the actual timetable of the current week.
+            ttl (float): Seconds before the week is fetched again.
+        """
+        super().__init__(ttl)
+        self.fetch = fetch
+        # (lessons by date, their begin minutes by date, all hours sorted)
+        self.index: tuple[dict[str, list[dict]], dict[str, list[int]], list[tuple[int, int, str]]] = ({}, {}, [])
+
+    def _pull(self) -> None:
+        week = self.fetch()
+        if self.changed("week", week):
+            self.build(week)
+
+    def update(self, week: dict) -> None:
+        """
+        Feeds a freshly fetched current week into the index.
+        """
+        with self._lock:
+            if self.changed("week", week):
+                self.build(week)
+            self.refreshed_at = time.monotonic()
+
+    def build(self, week: dict) -> None:
+        """
+        Builds the interval index from an actual timetable.
+        """
+        days, hours = lessons_by_day(week)
+        starts = {date: [lesson["Begin"] for lesson in lessons] for date, lessons in days.items()}
+        self.index = (days, starts, sorted(hours))
+
+    @staticmethod
+    def _view(lesson: dict, date: str) -> dict:
+        return {
+            **lesson,
+            "Date": date,
+            "Begin": _clock(lesson["Begin"]),
+            "End": _clock(lesson["End"]),
+        }
+
+    def now(self, at: datetime) -> dict | None:
+        """
+        Returns the lesson running at the given local time, or None.
+        """
+        self.refresh()
+        days, starts, _ = self.index
+        date = at.strftime("%Y-%m-%d")
+        minute = at.hour * 60 + at.minute
+        position = bisect.bisect_right(starts.get(date, []), minute) - 1
+        if position >= 0:
+            lesson = days[date][position]
+            if minute < lesson["End"]:
+                return self._view(lesson, date)
+        return None
+
+    def next(self, at: datetime) -> dict | None:
+        """
+        Returns the next lesson starting after the given local time within the
+        indexed week, or None.
+        """
+        self.refresh()
+        days, starts, _ = self.index
+        date = at.strftime("%Y-%m-%d")
+        minute = at.hour * 60 + at.minute
+        for day in sorted(d for d in days if d >= date):
+            lessons = days[day]
+            position = bisect.bisect_right(starts[day], minute) if day == date else 0
+            if position < len(lessons):
+                return self._view(lessons[position], day)
+        return None
+
+    def free_periods(self, day: str) -> list[dict]:
+        """
+        Returns the lesson hours without a lesson between the first and last
+        lesson of the day (YYYY-MM-DD).
+        """
+        self.refresh()
+        days, _, hours = self.index
+        lessons = days.get(day, [])
+        if not lessons:
+            return []
+        first, last = lessons[0]["Begin"], lessons[-1]["End"]
+        taken = {lesson["Begin"] for lesson in lessons}
+        return [
+            {"Hour": caption, "Begin": _clock(begin), "End": _clock(end)}
+            for begin, end, caption in hours
+            if first <= begin and end <= last and begin not in taken
+        ]
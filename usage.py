@@ -0,0 +1,58 @@
+from collections import Counter
+import json
+import os
+import tempfile
+import threading
+
+
+class UsageStats:
+    """
+    Per-tool call counts of an account, persisted in a JSON file.
+
+    Counts are buffered in memory and merged into the file every
+    flush_every calls, so worker processes sharing the file add up their
+    calls instead of overwriting each other's totals.
+    """
+
+    def __init__(self, path: str, flush_every: int = 10):
+        self.path = path
+        self.flush_every = flush_every
+        self.pending: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _load(self) -> Counter[str]:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return Counter(json.load(file))
+        except (FileNotFoundError, ValueError):
+            return Counter()
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            self.pending[name] += 1
+            if sum(self.pending.values()) < self.flush_every:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Merges the buffered counts into the file.
+        """
+        with self._lock:
+            if not self.pending:
+                return
+            counts = self._load() + self.pending
+            self.pending = Counter()
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(counts, file, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+
+    def most_used(self, count: int | None = None) -> list[str]:
+        """
+        Names of the most called tools, most called first (all of them by default).
+        """
+        with self._lock:
+            counts = self._load() + self.pending
+        return [name for name, _ in counts.most_common(count)]